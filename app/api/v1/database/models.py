@@ -1,5 +1,5 @@
 # External improts
-from typing import List
+from typing import Any, Dict, List
 from datetime import datetime
 from uuid import UUID
 from sqlalchemy import (
@@ -101,7 +101,9 @@ class StartingStories(Base):
         nullable=False,
     )
     story: Mapped[str] = mapped_column(String, nullable=False)
-    image: Mapped[str] = mapped_column(String, nullable=False)
+    # Legacy base64 image. New rows reference the image store by image_id.
+    image: Mapped[str] = mapped_column(String, nullable=True)
+    image_id: Mapped[str] = mapped_column(String(64), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.now
     )
@@ -159,9 +161,13 @@ class GameSessions(Base):
         SQLUUID, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
     session_name: Mapped[str] = mapped_column(String, nullable=True)
+    # Legacy base64 image. New rows reference the image store by image_id.
     last_image: Mapped[str] = mapped_column(String, nullable=True)
+    last_image_id: Mapped[str] = mapped_column(String(64), nullable=True)
     protagonist_name: Mapped[str] = mapped_column(String, nullable=False)
     inventory: Mapped[List[str]] = mapped_column(JSONB, nullable=False)
+    # Legacy storage of all scenes. New scenes are appended to game_scenes,
+    # see setup/migrate_scenes.py for moving old rows over.
     stories: Mapped[List[str]] = mapped_column(JSONB, nullable=False)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.now
@@ -170,10 +176,42 @@ class GameSessions(Base):
         DateTime, default=datetime.now, onupdate=datetime.now
     )
 
-    # Relationship
+    # Relationships
     user: Mapped["Users"] = relationship(
         "Users", back_populates="game_sessions"
     )
+    scenes: Mapped[List["GameScenes"]] = relationship(
+        "GameScenes",
+        back_populates="game_session",
+        cascade="all, delete-orphan",
+        order_by="GameScenes.seq",
+    )
+
+
+class GameScenes(Base):
+    """
+    One row per scene of a game session.
+    Saving only inserts the new scenes, so its cost does not grow with the
+    length of the session.
+    """
+
+    __tablename__ = "game_scenes"
+
+    game_session_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("game_sessions.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True)
+    scene: Mapped[Dict[str, Any]] = mapped_column(JSONB, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.now
+    )
+
+    # Relationship
+    game_session: Mapped["GameSessions"] = relationship(
+        "GameSessions", back_populates="scenes"
+    )
 
 
 class Reviews(Base):
@@ -273,3 +311,37 @@ class RateLimit(Base):
     user: Mapped["Users"] = relationship(
         "Users", back_populates="rate_limits"
     )
+
+
+class RateLimitCounters(Base):
+    """
+    Periodic snapshot of the in-memory rate limiter.
+    One row per rate limit key, holding the counters of its sliding window.
+    """
+
+    __tablename__ = "rate_limit_counters"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    key: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    window_seconds: Mapped[int] = mapped_column(Integer, nullable=False)
+    window_start: Mapped[int] = mapped_column(Integer, nullable=False)
+    current_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    previous_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.now, onupdate=datetime.now
+    )
+
+
+class SeedVersions(Base):
+    """
+    Version of each kind of seed data. fill_db bumps the version when it
+    reseeds, so workers that cache seed data know to reload it.
+    """
+
+    __tablename__ = "seed_versions"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.now, onupdate=datetime.now
+    )
@@ -13,28 +13,42 @@ We also need to change the way we call other methods within this class if they a
 """
 
 # External imports
-from sqlalchemy import select, insert, update, delete
-from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, update, delete, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from psycopg2.errors import UniqueViolation
 from fastapi import HTTPException
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from uuid import UUID
 from datetime import datetime, timedelta
 import re
 import uuid
-import bcrypt
 import secrets
 import base64
+import binascii
 
 # Internal imports
 from app.api.logger.loggable import Loggable
+from app.api.v1.database.token_cache import token_cache
+from app.api.v1.storage.image_store import (
+    get_image_store,
+    image_url,
+    is_image_id,
+)
+from app.api.v1.storage.image_variants import schedule_variants
+from app.api.v1.database.starting_story_cache import (
+    CachedResponse,
+    starting_story_cache,
+)
+from app.api.v1.database.password_hashing import (
+    hash_password,
+    check_password,
+)
 
 from app.api.v1.database.models import (
     Users,
     Tokens,
-    StartingStories,
     GameSessions,
+    GameScenes,
     EmailTokens,
 )
 from app.api.v1.validation.schemas import (
@@ -46,7 +60,7 @@ from app.api.v1.validation.schemas import (
 
 
 class DatabaseOperations(Loggable):
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         super().__init__()
         self.db = db
         self.logger.info("Database operations initialized with session")
@@ -55,9 +69,9 @@ class DatabaseOperations(Loggable):
     USER MANAGER
     """
 
-    def create_user(self, token: str) -> Dict:
+    async def create_user(self, token: str) -> Dict:
         """Creates a new row in the users table with information taken from email_token table."""
-        user_data = self._validate_email_token(token)
+        user_data = await self._validate_email_token(token)
         self.logger.info(f"Creating new user: {user_data.email[:10]}...")
         for attempt in range(3):
             try:
@@ -67,10 +81,11 @@ class DatabaseOperations(Loggable):
                     password=user_data.password,
                 )
                 self.db.add(db_user)
-                self.db.commit()
-                self.db.refresh(db_user)
+                await self.db.commit()
+                await self.db.refresh(db_user)
                 break
-            except (UniqueViolation, IntegrityError):
+            except IntegrityError:
+                await self.db.rollback()
                 self.logger.error(
                     "Error posting to Users table due to UUID unique constraint. "
                     "If this happened, reality is a simulation."
@@ -81,52 +96,51 @@ class DatabaseOperations(Loggable):
                         detail="User creation failed when posting to database.",
                     )
                 continue
-        access_token = self._create_access_token(db_user.id)
+        access_token = await self._create_access_token(db_user.id)
         return {"access_token": access_token}
 
-    def login_user(self, user: UserLogin):
+    async def login_user(self, user: UserLogin):
         """Logs in a user by creating a new authorization token. Activates a user if they are not active."""
         self.logger.info(f"Logging in user: {user.email[:10]}...")
         stmt = select(Users).where(Users.email == user.email)
-        result = self.db.execute(stmt)
+        result = await self.db.execute(stmt)
         db_user = result.scalar_one_or_none()
         if db_user is None:
             raise HTTPException(status_code=404, detail="User not found")
-        if not bcrypt.checkpw(
-            user.password.encode("utf-8"), db_user.password.encode("utf-8")
-        ):
+        if not await check_password(user.password, db_user.password):
             raise HTTPException(status_code=401, detail="Invalid credentials")
         if db_user.is_active is False:
-            self.activate_user(db_user.id)
-        token = self._create_access_token(user_id=db_user.id)
+            await self.activate_user(db_user.id)
+        token = await self._create_access_token(user_id=db_user.id)
         return token
 
-    def logout_user(self, user_id: UUID):
+    async def logout_user(self, user_id: UUID):
         """Logout a user by deleting their active tokens"""
         stmt = delete(Tokens).where(Tokens.user_id == user_id)
-        self.db.execute(stmt)
-        self.db.commit()
+        await self.db.execute(stmt)
+        await self.db.commit()
+        token_cache.invalidate_user(user_id)
         self.logger.info(
             f"Removed all tokens for user ID: {str(user_id)[:10]}..."
         )
 
-    def update_user(self, user_id: UUID, user: UserUpdate):
+    async def update_user(self, user_id: UUID, user: UserUpdate):
         """Updates a user in the database"""
         nud = {}  # New-User-Data
         for key, value in user.model_dump().items():
             if value is not None:
                 nud[key] = value
         if "password" in nud:
-            nud["password"] = self._hash_password(nud["password"])
+            nud["password"] = await self._hash_password(nud["password"])
         stmt = (
             update(Users)
             .where(Users.id == user_id)
             .values(**nud)
             .returning(Users)
         )
-        result = self.db.execute(stmt)
+        result = await self.db.execute(stmt)
         updated_user = result.scalar_one_or_none()
-        self.db.commit()
+        await self.db.commit()
         if updated_user:
             return updated_user
         else:
@@ -135,13 +149,13 @@ class DatabaseOperations(Loggable):
                 "but the user_id does not exist in the database.\n"
                 "Removing all tokens for this user.."
             )
-            self.logout_user(user_id)
+            await self.logout_user(user_id)
             raise HTTPException(
                 status_code=404,
                 detail="User not found",
             )
 
-    def activate_user(self, user_id: UUID):
+    async def activate_user(self, user_id: UUID):
         """Activate a user by setting is_active to True"""
         stmt = (
             update(Users)
@@ -149,33 +163,33 @@ class DatabaseOperations(Loggable):
             .values(is_active=True)
             .returning(Users)
         )
-        result = self.db.execute(stmt)
+        result = await self.db.execute(stmt)
         updated_user = result.scalar_one_or_none()
-        self.db.commit()
+        await self.db.commit()
         if updated_user is None:
             self.logger.critical(
                 f"Token for user ID: {user_id} passed authorization check "
                 "but the user_id does not exist in the database.\n"
                 "Removing all tokens for this user.."
             )
-            self.logout_user(user_id)
+            await self.logout_user(user_id)
             raise HTTPException(
                 status_code=404,
                 detail="User not found",
             )
 
-    def deactivate_user(self, user_id: UUID):
+    async def deactivate_user(self, user_id: UUID):
         """Deactivates a user by changing their is_active-column to False"""
-        self.logout_user(user_id)
+        await self.logout_user(user_id)
         stmt = (
             update(Users)
             .where(Users.id == user_id)
             .values(is_active=False)
             .returning(Users)
         )
-        result = self.db.execute(stmt)
+        result = await self.db.execute(stmt)
         updated_user = result.scalar_one_or_none()
-        self.db.commit()
+        await self.db.commit()
         if updated_user is None:
             self.logger.critical(
                 f"A token tied to user ID: {user_id} successfully "
@@ -187,16 +201,16 @@ class DatabaseOperations(Loggable):
                 detail="User not found",
             )
 
-    def hard_delete_user(self, user_id: UUID):
+    async def hard_delete_user(self, user_id: UUID):
         """Hard deletes a user by removing their row from the database"""
         get_stmt = select(Users).where(Users.id == user_id)
-        result = self.db.execute(get_stmt)
+        result = await self.db.execute(get_stmt)
         user = result.scalar_one_or_none()
         email = user.email
 
-        self.logout_user(user_id)
+        await self.logout_user(user_id)
         delete_stmt = delete(Users).where(Users.id == user_id)
-        result = self.db.execute(delete_stmt)
+        result = await self.db.execute(delete_stmt)
         if result.rowcount == 0:
             self.logger.critical(
                 f"A token tied to user ID: {user_id} successfully "
@@ -208,11 +222,11 @@ class DatabaseOperations(Loggable):
                 detail="User not found",
             )
         else:
-            self.db.commit()
+            await self.db.commit()
             self.logger.info(
                 f"Successfully deleted user ID: {str(user_id)[:10]}..."
             )
-        self._delete_email_tokens(email)
+        await self._delete_email_tokens(email)
         return {"message": "User deleted successfully"}
 
     def _validate_email(self, email: str) -> bool:
@@ -222,11 +236,11 @@ class DatabaseOperations(Loggable):
         is_valid = re.match(email_pattern, email)
         return bool(is_valid)
 
-    def _check_existing_user(self, email: str) -> bool:
+    async def _check_existing_user(self, email: str) -> bool:
         """Checks if a user with the given email already exists"""
         self.logger.debug(f"Checking if email: {email[:5]} exists...")
         stmt = select(Users).where(Users.email == email)
-        result = self.db.execute(stmt)
+        result = await self.db.execute(stmt)
         existing_user = result.scalar_one_or_none()
         return bool(existing_user)
 
@@ -241,26 +255,26 @@ class DatabaseOperations(Loggable):
         token = token.rstrip("=")
         return token
 
-    def _create_access_token(self, user_id: UUID) -> str:
+    async def _create_access_token(self, user_id: UUID) -> str:
         """Generates a new authorization token for a user and deletes all their previous tokens"""
         self.logger.debug(
             f"Creating access token for user ID: {str(user_id)[:10]}..."
         )
-        self.logout_user(user_id)
+        await self.logout_user(user_id)
         token = self.generate_token()
         current_time = datetime.now()
         expires_at = current_time + timedelta(hours=720)  # 30 days
         db_token = Tokens(token=token, expires_at=expires_at, user_id=user_id)
         self.db.add(db_token)
-        self.db.commit()
-        self.db.refresh(db_token)
+        await self.db.commit()
+        await self.db.refresh(db_token)
         return token
 
-    def validate_token(self, token: str) -> UUID:
+    async def validate_token(self, token: str) -> UUID:
         """Validates an authorization token and returns the user_id"""
         self.logger.info(f"Validating user token: {token[:10]}...")
         stmt = select(Tokens).where(Tokens.token == token)
-        result = self.db.execute(stmt)
+        result = await self.db.execute(stmt)
         token_data = result.scalar_one_or_none()
         if not token_data:
             raise HTTPException(
@@ -274,62 +288,62 @@ class DatabaseOperations(Loggable):
             )
             return user_id
 
-    def create_email_token(self, user: UserCreate) -> str:
+    async def create_email_token(self, user: UserCreate) -> str:
         """Generates new token and creates a row in the EmailTokens table"""
         if not self._validate_email(user.email):
             raise HTTPException(
                 status_code=400,
                 detail="Invalid email format",
             )
-        if self._check_existing_user(user.email):
+        if await self._check_existing_user(user.email):
             raise HTTPException(
                 status_code=400,
                 detail="User with this email already exists",
             )
         try:
-            token = self._post_email_token(user)
-        except (UniqueViolation, IntegrityError):
-            self.db.rollback()
-            self._delete_email_tokens(email=user.email)
-            token = self._post_email_token(user)
+            token = await self._post_email_token(user)
+        except IntegrityError:
+            await self.db.rollback()
+            await self._delete_email_tokens(email=user.email)
+            token = await self._post_email_token(user)
         return token
 
-    def _post_email_token(self, user: UserCreate) -> str:
+    async def _post_email_token(self, user: UserCreate) -> str:
         """Creates a new email-token row for a user"""
-        hashed_pw = self._hash_password(user.password)
+        hashed_pw = await self._hash_password(user.password)
         token = self.generate_token()
         stmt = insert(EmailTokens).values(
             email=user.email,
             password=hashed_pw,
             token=token,
         )
-        self.db.execute(stmt)
-        self.db.commit()
+        await self.db.execute(stmt)
+        await self.db.commit()
 
         return token
 
-    def _delete_email_tokens(self, email: str):
+    async def _delete_email_tokens(self, email: str):
         stmt = delete(EmailTokens).where(EmailTokens.email == email)
-        self.db.execute(stmt)
-        self.db.commit()
+        await self.db.execute(stmt)
+        await self.db.commit()
 
-    def _validate_email_token(self, token: str) -> Users:
+    async def _validate_email_token(self, token: str) -> Users:
         """Checks if an email exists in databaseand returns the database object"""
         stmt = select(EmailTokens).where(EmailTokens.token == token)
-        result = self.db.execute(stmt)
+        result = await self.db.execute(stmt)
         user = result.scalar_one_or_none()
         if not user:
             raise HTTPException(status_code=404, detail="Token not found")
         if user.created_at + timedelta(minutes=60) < datetime.now():
-            self._delete_email_tokens(user.email)
+            await self._delete_email_tokens(user.email)
             raise HTTPException(status_code=401, detail="Token expired")
         return user
 
-    def update_email_token(self, email: str) -> str:
+    async def update_email_token(self, email: str) -> str:
         """Generates and changes the email token for a user"""
         self.logger.info(f"Updating email token for user: {email[:5]}...")
         stmt = select(EmailTokens).where(EmailTokens.email == email)
-        result = self.db.execute(stmt)
+        result = await self.db.execute(stmt)
         token_data = result.scalar_one_or_none()
         if not token_data:
             raise HTTPException(
@@ -344,60 +358,60 @@ class DatabaseOperations(Loggable):
                 created_at=datetime.now(),
             )
         )
-        self.db.execute(stmt)
-        self.db.commit()
+        await self.db.execute(stmt)
+        await self.db.commit()
         return new_token
 
-    def reset_password(self, token: str, password: str):
+    async def reset_password(self, token: str, password: str):
         """Changes a user's password via reset link"""
-        user_data = self._validate_email_token(token)
-        hashed_pw = self._hash_password(password)
+        user_data = await self._validate_email_token(token)
+        hashed_pw = await self._hash_password(password)
         stmt = (
             update(Users)
             .where(Users.email == user_data.email)
             .values(password=hashed_pw)
         )
-        self.db.execute(stmt)
-        self.db.commit()
-        self.update_email_token(user_data.email)  # Makes link a one-time use
+        await self.db.execute(stmt)
+        await self.db.commit()
+        # Makes link a one-time use
+        await self.update_email_token(user_data.email)
         return user_data
 
-    def _hash_password(self, password: str) -> str:
-        password_bytes = password.encode("utf-8")
-        salt = bcrypt.gensalt()
-        hashed_password = bcrypt.hashpw(password_bytes, salt)
-        hashed_password_str = hashed_password.decode("utf-8")
-        return hashed_password_str
+    async def _hash_password(self, password: str) -> str:
+        """Hashes a password without blocking the event loop"""
+        return await hash_password(password)
 
     """
     GAME MANAGER
     """
 
-    def get_start_story(self, story_id: str):
-        """Gets a starting story from the database"""
+    async def get_start_story(self, story_id: int) -> CachedResponse:
+        """
+        Gets a starting story from the starting story cache.
+        The database is only queried when the cache has to be (re)loaded.
+        """
         self.logger.info(f"Getting story with ID: {story_id}")
-
-        stmt = select(StartingStories).where(StartingStories.id == story_id)
-        result = self.db.execute(stmt)
-        starting_story = result.scalar_one_or_none()
-
-        if starting_story.story is None or starting_story.image is None:
+        starting_story = await starting_story_cache.get_story(
+            self.db, story_id
+        )
+        if starting_story is None:
             self.logger.error(f"Story with ID {story_id} not found")
             raise HTTPException(
                 status_code=404,
                 detail=f"Story with ID {story_id} not found",
             )
-        return {
-            "image": starting_story.image,
-            "story": starting_story.story,
-            "id": starting_story.id,
-        }
+        return starting_story
+
+    async def get_categories(self) -> CachedResponse:
+        """Gets every adventure category and the ids of its stories"""
+        return await starting_story_cache.get_categories(self.db)
 
-    def load_game(self, user_id: str):
+    async def load_game(self, user_id: str):
         """Gets all game sessions from a user"""
         stmt = select(GameSessions).where(GameSessions.user_id == user_id)
-        result = self.db.execute(stmt)
+        result = await self.db.execute(stmt)
         all_saves: List[GameSessions] = result.scalars().all()
+        scenes = await self._get_scenes([save.id for save in all_saves])
         response_data = []
         for save in all_saves:
             response_data.append(
@@ -406,17 +420,159 @@ class DatabaseOperations(Loggable):
                     "protagonist_name": save.protagonist_name,
                     "inventory": save.inventory,
                     "session_name": save.session_name,
-                    "stories": save.stories,
-                    "image": save.last_image,
+                    "stories": save.stories + scenes.get(save.id, []),
+                    "image": await self._load_base64_image(save),
+                    "image_url": image_url(save.last_image_id, "full"),
                     "last_played": save.updated_at,
                 }
             )
         return response_data
 
-    def get_user_profile(self, user_id: UUID) -> Dict[str, Any]:
+    async def _load_base64_image(self, save: GameSessions) -> Optional[str]:
+        """
+        The last image of a save as base64, for clients of /load_game.
+        Reads the image store for new rows and the legacy column for old ones.
+        """
+        if save.last_image_id:
+            data = await get_image_store().get_async(save.last_image_id)
+            return base64.b64encode(data).decode("utf-8")
+        return save.last_image
+
+    async def list_saves(
+        self, user_id: UUID, limit: int = 20, cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Lists a page of a user's saves, most recently played first.
+        Only the columns a save picker needs are selected, never the stories
+        or the image. Pages are fetched by keyset on (updated_at, id), so
+        every page costs the same no matter how deep it is.
+        """
+        scene_count = (
+            select(func.count())
+            .where(GameScenes.game_session_id == GameSessions.id)
+            .scalar_subquery()
+        )
+        stmt = (
+            select(
+                GameSessions.id,
+                GameSessions.session_name,
+                GameSessions.protagonist_name,
+                GameSessions.last_image_id,
+                GameSessions.updated_at,
+                (
+                    func.jsonb_array_length(GameSessions.stories) + scene_count
+                ).label("scene_count"),
+            )
+            .where(GameSessions.user_id == user_id)
+            .order_by(GameSessions.updated_at.desc(), GameSessions.id.desc())
+            .limit(limit + 1)
+        )
+        if cursor:
+            last_played, last_id = self._decode_cursor(cursor)
+            stmt = stmt.where(
+                tuple_(GameSessions.updated_at, GameSessions.id)
+                < tuple_(last_played, last_id)
+            )
+        rows = (await self.db.execute(stmt)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self._encode_cursor(rows[-1].updated_at, rows[-1].id)
+        saves = [
+            {
+                "id": row.id,
+                "session_name": row.session_name,
+                "protagonist_name": row.protagonist_name,
+                "scene_count": row.scene_count,
+                "image_url": image_url(row.last_image_id, "full"),
+                "thumbnail_url": image_url(row.last_image_id, "thumb"),
+                "last_played": row.updated_at,
+            }
+            for row in rows
+        ]
+        return {"saves": saves, "next_cursor": next_cursor}
+
+    def _encode_cursor(self, last_played: datetime, game_id: int) -> str:
+        raw = f"{last_played.isoformat()}|{game_id}".encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("utf-8").rstrip("=")
+
+    def _decode_cursor(self, cursor: str):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(padded).decode("utf-8")
+            last_played, game_id = raw.split("|")
+            return datetime.fromisoformat(last_played), int(game_id)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    async def get_save(self, user_id: UUID, game_id: int) -> Dict[str, Any]:
+        """Gets the full session of one save, without the image"""
+        stmt = select(
+            GameSessions.id,
+            GameSessions.protagonist_name,
+            GameSessions.inventory,
+            GameSessions.session_name,
+            GameSessions.stories,
+            GameSessions.updated_at,
+        ).where(GameSessions.id == game_id, GameSessions.user_id == user_id)
+        save = (await self.db.execute(stmt)).one_or_none()
+        if save is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Game with ID {game_id} not found",
+            )
+        scenes = await self._get_scenes([save.id])
+        return {
+            "id": save.id,
+            "protagonist_name": save.protagonist_name,
+            "inventory": save.inventory,
+            "session_name": save.session_name,
+            "stories": save.stories + scenes.get(save.id, []),
+            "last_played": save.updated_at,
+        }
+
+    async def get_save_image(
+        self, user_id: UUID, game_id: int
+    ) -> Dict[str, Optional[str]]:
+        """
+        Gets the last image of one save.
+        Saves made before the image store only have the base64 image.
+        """
+        stmt = select(
+            GameSessions.last_image, GameSessions.last_image_id
+        ).where(GameSessions.id == game_id, GameSessions.user_id == user_id)
+        save = (await self.db.execute(stmt)).one_or_none()
+        if save is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Game with ID {game_id} not found",
+            )
+        return {
+            "image": None if save.last_image_id else save.last_image,
+            "image_id": save.last_image_id,
+            "image_url": image_url(save.last_image_id, "full"),
+            "thumbnail_url": image_url(save.last_image_id, "thumb"),
+        }
+
+    async def _get_scenes(self, game_ids: List[int]) -> Dict[int, List]:
+        """Gets the appended scenes of several game sessions in one query"""
+        if not game_ids:
+            return {}
+        stmt = (
+            select(GameScenes.game_session_id, GameScenes.scene)
+            .where(GameScenes.game_session_id.in_(game_ids))
+            .order_by(GameScenes.game_session_id, GameScenes.seq)
+        )
+        result = await self.db.execute(stmt)
+        scenes: Dict[int, List] = {}
+        for game_id, scene in result:
+            scenes.setdefault(game_id, []).append(scene)
+        return scenes
+
+    async def get_user_profile(self, user_id: UUID) -> Dict[str, Any]:
         """Gets a user's profile information"""
         stmt = select(Users).where(Users.id == user_id)
-        result = self.db.execute(stmt)
+        result = await self.db.execute(stmt)
         user = result.scalar_one_or_none()
 
         if not user:
@@ -433,46 +589,104 @@ class DatabaseOperations(Loggable):
             "registered_at": created_date,
         }
 
-    def save_game_route(self, data: SaveGame, user_id):
-        """Saves a game session."""
+    async def save_game_route(self, data: SaveGame, user_id):
+        """
+        Saves a game session.
+        Scenes are appended to game_scenes, so only the new scenes are written.
+        The image is kept in the image store and the row only references it.
+        """
+        image_id = await self._store_save_image(data)
         # Saving to a new row
         if data.game_session.id is None:
             stmt = (
                 insert(GameSessions)
                 .values(
                     user_id=user_id,
-                    last_image=data.image,
+                    last_image=None,
+                    last_image_id=image_id,
                     protagonist_name=data.game_session.protagonist_name,
                     session_name=data.game_session.session_name,
                     inventory=data.game_session.inventory,
-                    stories=data.game_session.scenes,
+                    stories=[],
                 )
                 .returning(GameSessions.id)
             )
-            result = self.db.execute(stmt)
+            result = await self.db.execute(stmt)
             game_id = result.scalar_one()
+            last_seq = 0
 
         # Saving to an existing row
         else:
-            existing_stmt = select(GameSessions.stories).where(
-                GameSessions.id == data.game_session.id
+            game_id = data.game_session.id
+            # Locks the session row so concurrent saves append in turn
+            lock_stmt = (
+                select(GameSessions.id)
+                .where(
+                    GameSessions.id == game_id,
+                    GameSessions.user_id == user_id,
+                )
+                .with_for_update()
             )
-            result = self.db.execute(existing_stmt)
-            old_scenes = result.scalar_one_or_none()
-            updated_scenes = old_scenes + data.game_session.scenes
+            result = await self.db.execute(lock_stmt)
+            if result.scalar_one_or_none() is None:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Game with ID {game_id} not found",
+                )
+            seq_stmt = select(
+                func.coalesce(func.max(GameScenes.seq), 0)
+            ).where(GameScenes.game_session_id == game_id)
+            last_seq = (await self.db.execute(seq_stmt)).scalar_one()
             stmt = (
                 update(GameSessions)
-                .where(GameSessions.id == data.game_session.id)
+                .where(GameSessions.id == game_id)
                 .values(
-                    last_image=data.image,
+                    last_image=None,
+                    last_image_id=image_id,
                     session_name=data.game_session.session_name,
                     inventory=data.game_session.inventory,
-                    stories=updated_scenes,
                 )
             )
-            self.db.execute(stmt)
-            game_id = data.game_session.id
-
-        self.db.commit()
+            await self.db.execute(stmt)
+
+        if data.game_session.scenes:
+            await self.db.execute(
+                insert(GameScenes),
+                [
+                    {"game_session_id": game_id, "seq": seq, "scene": scene}
+                    for seq, scene in enumerate(
+                        data.game_session.scenes, start=last_seq + 1
+                    )
+                ],
+            )
+        await self.db.commit()
 
         return game_id
+
+    async def _store_save_image(self, data: SaveGame) -> Optional[str]:
+        """
+        Returns the image_id of the image in a save.
+        Clients can send the image_id from /generate_new_scene, or a base64
+        image which is then added to the image store.
+        """
+        store = get_image_store()
+        if data.image_id:
+            if not is_image_id(data.image_id) or not store.exists(
+                data.image_id
+            ):
+                raise HTTPException(
+                    status_code=400,
+                    detail="Unknown image_id",
+                )
+            return data.image_id
+        if data.image:
+            try:
+                image_id = await store.put_base64_async(data.image)
+            except (binascii.Error, ValueError):
+                raise HTTPException(
+                    status_code=400,
+                    detail="Image is not valid base64",
+                )
+            schedule_variants(image_id)
+            return image_id
+        return None
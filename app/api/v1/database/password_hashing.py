@@ -0,0 +1,68 @@
+"""
+Async password hashing.
+
+bcrypt is deliberately slow and CPU-bound. Running it on the event loop
+blocks every other request on the worker for the whole hash, so all hashing
+and checking is sent to a bounded thread pool instead. bcrypt releases the
+GIL while it works, which lets the pool scale with the number of cores.
+"""
+
+# External imports
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import asyncio
+import os
+import bcrypt
+
+# Internal imports
+from app.settings import settings
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Returns the process-wide bcrypt pool, creating it on first use"""
+    global _executor
+    if _executor is None:
+        workers = settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+        _executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bcrypt"
+        )
+    return _executor
+
+
+def shutdown_executor():
+    """Stops the pool. Called when the application shuts down."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+def _hash_password_sync(password: str) -> str:
+    password_bytes = password.encode("utf-8")
+    salt = bcrypt.gensalt()
+    hashed_password = bcrypt.hashpw(password_bytes, salt)
+    return hashed_password.decode("utf-8")
+
+
+def _check_password_sync(password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(
+        password.encode("utf-8"), hashed_password.encode("utf-8")
+    )
+
+
+async def hash_password(password: str) -> str:
+    """Hashes a password on the bcrypt pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(), _hash_password_sync, password
+    )
+
+
+async def check_password(password: str, hashed_password: str) -> bool:
+    """Checks a password against its hash on the bcrypt pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(), _check_password_sync, password, hashed_password
+    )
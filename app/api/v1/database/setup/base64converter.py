@@ -1,31 +1,57 @@
 import os
 import base64
+import mmap
+from functools import lru_cache
+from typing import BinaryIO
 
 """
 This file is used when filling the database with dummy data.
 Check fill_db.starting_stories
 
-If you want to change the images, simply change img_name below or replace the image in the images folder.
+If you want to change the images, simply change IMAGES below or replace the image in the images folder.
+
+Nothing is read at import. Images are memory-mapped the first time they are
+needed, so the OS pages them in on demand and they are never copied into
+Python strings unless a base64 version is asked for.
 """
 
+IMAGES = {
+    "img1": "images/fantasy.png",
+    "img2": "images/horror.png",
+    "img3": "images/scifi.png",
+}
 
-def convert_img(img_name: str) -> str:
+
+def image_path(img_name: str) -> str:
     file_path = os.path.dirname(__file__)
-    img_path = os.path.join(file_path, img_name)
-    with open(img_path, "rb") as i:
-        b64img = base64.b64encode(i.read()).decode("utf-8")
-    return b64img
+    return os.path.join(file_path, img_name)
+
+
+def open_img(img_name: str) -> BinaryIO:
+    """Opens an image for streaming, for example into the image store"""
+    return open(image_path(img_name), "rb")
+
+
+@lru_cache(maxsize=None)
+def map_img(img_name: str) -> mmap.mmap:
+    """Read-only memory map of an image, created once per image"""
+    with open_img(img_name) as i:
+        return mmap.mmap(i.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+@lru_cache(maxsize=None)
+def convert_img(img_name: str) -> str:
+    return base64.b64encode(map_img(img_name)).decode("utf-8")
 
 
-img1 = convert_img("images/fantasy.png")
-img2 = convert_img("images/horror.png")
-img3 = convert_img("images/scifi.png")
+def __getattr__(name: str) -> str:
+    # img1, img2 and img3 used to be encoded at import. They are still
+    # importable, but only encoded on first access.
+    if name in IMAGES:
+        return convert_img(IMAGES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
-    if img1:
-        print(img1[:100])
-        print(img2[:100])
-        print(img3[:100])
-    else:
-        print("img1 is None")
+    for name, img_name in IMAGES.items():
+        print(name, convert_img(img_name)[:100])
@@ -4,25 +4,30 @@ Script for filling the database with neccesary starting-data.
 
 # External imports
 from fastapi import Depends
-from app.db_setup import get_db
+from app.db_setup import get_sync_db
 from sqlalchemy.orm import Session
 from sqlalchemy import insert, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 # Internal imports
-from app.api.v1.database.setup.base64converter import img1, img2, img3
+from app.api.v1.database.setup.base64converter import IMAGES, open_img
+from app.api.v1.storage.image_store import get_image_store
 from app.api.v1.database.models import (
     AdventureCategories,
     StartingStories,
     Reviews,
     PaymentMethods,
+    SeedVersions,
 )
+from app.api.v1.database.starting_story_cache import STARTING_STORIES_SEED
 
 
-def fill_db(session: Session = Depends(get_db)):
+def fill_db(session: Session = Depends(get_sync_db)):
     categories(session)
     session.commit()
 
     starting_stories(session)
+    bump_seed_version(session, STARTING_STORIES_SEED)
     session.commit()
 
     reviews(session)
@@ -34,6 +39,16 @@ def fill_db(session: Session = Depends(get_db)):
     print("All data has been successfully inserted!")
 
 
+def bump_seed_version(session: Session, name: str):
+    """Tells the API workers that their cached copy of name is stale"""
+    stmt = pg_insert(SeedVersions).values(name=name, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SeedVersions.name],
+        set_={"version": SeedVersions.version + 1},
+    )
+    session.execute(stmt)
+
+
 def categories(session: Session):
     print("Inserting categories...")
     session.execute(
@@ -53,10 +68,11 @@ def categories(session: Session):
 
 def starting_stories(session: Session):
     print("Inserting starting stories...")
+    store = get_image_store()
     stories = [
         {
             "category_id": 1,  # Fantasy
-            "image": img1,
+            "image": IMAGES["img1"],
             "story": """
 You paused to catch your breath as you reached the top of the old tower. Sunlight filtered through cracked windows, illuminating the object you had been searching for—a crown, split in two, resting on a stone pedestal.
 For years, unusual cold seasons had troubled the kingdom since the crown's separation. Village elders spoke of balance that could be restored, while others whispered that its power should be relinquished entirely.
@@ -65,7 +81,7 @@ You studied the artifact with curiosity.
         },
         {
             "category_id": 2,  # Horror
-            "image": img2,
+            "image": IMAGES["img2"],
             "story": """
 Your fingers clawed at the wet earth as the sinkhole widened beneath the basement floor.
 "Help!" your scream echoed, but the realtor had left hours ago.
@@ -75,7 +91,7 @@ The fall lasted seconds but felt eternal. Now, bleeding and disoriented in a cha
         },
         {
             "category_id": 3,  # Science Fiction
-            "image": img3,
+            "image": IMAGES["img3"],
             "story": """
 You crashed to the deck as the transport's rear section tore away, venting atmosphere and three screaming soldiers into the void. Emergency lights bathed the corridor in crimson.
 "Hostiles on the hull!" the Lieutenant shouted, his voice distorted through the comm as your helmet sealed automatically. "Defense turrets were deactivated!"
@@ -85,6 +101,9 @@ A section of wall buckled inward with a tortured screech of metal. Behind it, yo
         },
     ]
     for story in stories:
+        # Streamed into the image store one image at a time
+        with open_img(story.pop("image")) as image:
+            story["image_id"] = store.put_stream(image)
         session.execute(insert(StartingStories).values(**story))
     session.flush()
     print("Starting stories inserted successfully")
@@ -145,9 +164,9 @@ def payment_methods(session: Session):
 
 
 if __name__ == "__main__":
-    from app.db_setup import get_db
+    from app.db_setup import get_sync_db
 
-    session = next(get_db())
+    session = next(get_sync_db())
     try:
         fill_db(session=session)
         print("Database filled with dummy data successfully!")
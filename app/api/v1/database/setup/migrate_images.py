@@ -0,0 +1,112 @@
+"""
+Script for moving base64 images out of the database into the image store.
+
+starting_stories.image and game_sessions.last_image used to hold whole
+base64 encoded images. New rows only store an image_id that points into the
+image store, and rows that still have a base64 image keep working, so this
+script is only needed to shrink the tables.
+
+Adds the image_id columns if they are missing. Safe to run more than once.
+
+    python -m app.api.v1.database.setup.migrate_images
+"""
+
+# External imports
+from sqlalchemy import select, update, text
+from sqlalchemy.orm import Session
+
+# Internal imports
+from app.api.v1.database.models import StartingStories, GameSessions
+from app.api.v1.storage.image_store import ImageStore, get_image_store
+from app.api.v1.database.setup.fill_db import bump_seed_version
+from app.api.v1.database.starting_story_cache import STARTING_STORIES_SEED
+
+SCHEMA_CHANGES = [
+    "ALTER TABLE starting_stories "
+    "ADD COLUMN IF NOT EXISTS image_id VARCHAR(64)",
+    "ALTER TABLE starting_stories ALTER COLUMN image DROP NOT NULL",
+    "ALTER TABLE game_sessions "
+    "ADD COLUMN IF NOT EXISTS last_image_id VARCHAR(64)",
+]
+
+
+def migrate_schema(session: Session):
+    """Adds the image_id columns to tables created before they existed"""
+    for statement in SCHEMA_CHANGES:
+        session.execute(text(statement))
+    session.commit()
+
+
+def migrate_images(
+    session: Session, store: ImageStore, model, image_column, id_column
+) -> int:
+    """
+    Moves the base64 image of every row of model into the store and
+    returns how many were moved.
+    Rows are committed one at a time so a large table is never held in
+    memory, and a failing row does not undo the rows before it. Rows whose
+    image cannot be decoded are left untouched and reported, so they can
+    be inspected before anything is dropped.
+    """
+    stmt = select(model.id).where(image_column.isnot(None))
+    row_ids = session.execute(stmt).scalars().all()
+    print(f"Found {len(row_ids)} {model.__tablename__} rows to migrate")
+    migrated = 0
+    invalid = []
+    for row_id in row_ids:
+        b64_image = session.execute(
+            select(image_column).where(model.id == row_id).with_for_update()
+        ).scalar_one()
+        if b64_image is None:
+            continue
+        try:
+            image_id = store.put_base64(b64_image)
+        except ValueError:
+            # binascii.Error is a ValueError
+            session.rollback()
+            invalid.append(row_id)
+            continue
+        values = {image_column.key: None, id_column.key: image_id}
+        if model is GameSessions:
+            values["updated_at"] = GameSessions.updated_at
+        session.execute(update(model).where(model.id == row_id).values(values))
+        session.commit()
+        migrated += 1
+    if invalid:
+        print(
+            f"Left {len(invalid)} {model.__tablename__} rows with images "
+            f"that could not be decoded: {invalid}"
+        )
+    return migrated
+
+
+if __name__ == "__main__":
+    from app.db_setup import get_sync_db, init_db
+
+    init_db()
+    session = next(get_sync_db())
+    try:
+        migrate_schema(session)
+        store = get_image_store()
+        count = migrate_images(
+            session,
+            store,
+            StartingStories,
+            StartingStories.image,
+            StartingStories.image_id,
+        )
+        bump_seed_version(session, STARTING_STORIES_SEED)
+        session.commit()
+        count += migrate_images(
+            session,
+            store,
+            GameSessions,
+            GameSessions.last_image,
+            GameSessions.last_image_id,
+        )
+        print(f"Migrated {count} images successfully!")
+    except Exception as e:
+        session.rollback()
+        print(f"Error migrating images: {str(e)}")
+    finally:
+        session.close()
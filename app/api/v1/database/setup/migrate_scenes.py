@@ -0,0 +1,92 @@
+"""
+Script for moving scenes from game_sessions.stories into game_scenes.
+
+Before game_scenes existed, every save rewrote the whole stories array of a
+game session. New saves only append to game_scenes, and load_game reads
+stories followed by game_scenes, so old rows keep working without this
+script. Running it moves the old arrays over and empties them.
+
+Safe to run more than once and while the API is running:
+every session is migrated in its own transaction with its row locked.
+
+    python -m app.api.v1.database.setup.migrate_scenes
+"""
+
+# External imports
+from sqlalchemy import select, update, func, text
+from sqlalchemy.orm import Session
+
+# Internal imports
+from app.api.v1.database.models import GameSessions, GameScenes
+
+
+def migrate_scenes(session: Session) -> int:
+    """Migrates every game session that still has legacy stories"""
+    stmt = select(GameSessions.id).where(
+        func.jsonb_array_length(GameSessions.stories) > 0
+    )
+    game_ids = session.execute(stmt).scalars().all()
+    print(f"Found {len(game_ids)} game sessions to migrate")
+    for game_id in game_ids:
+        migrate_game_session(session, game_id)
+        session.commit()
+    return len(game_ids)
+
+
+def migrate_game_session(session: Session, game_id: int):
+    """
+    Moves the stories of one game session into game_scenes.
+    Legacy stories are older than any appended scene, so appended scenes
+    are shifted up to make room in front of them.
+    """
+    lock_stmt = (
+        select(GameSessions.stories)
+        .where(GameSessions.id == game_id)
+        .with_for_update()
+    )
+    stories = session.execute(lock_stmt).scalar_one()
+    if not stories:
+        return
+    offset = len(stories)
+    # Two steps so the shifted seqs never collide with the primary key
+    session.execute(
+        update(GameScenes)
+        .where(GameScenes.game_session_id == game_id)
+        .values(seq=-GameScenes.seq)
+    )
+    session.execute(
+        update(GameScenes)
+        .where(GameScenes.game_session_id == game_id)
+        .values(seq=-GameScenes.seq + offset)
+    )
+    session.execute(
+        text(
+            "INSERT INTO game_scenes (game_session_id, seq, scene, created_at) "
+            "SELECT :game_id, ordinality, value, now() "
+            "FROM jsonb_array_elements("
+            "(SELECT stories FROM game_sessions WHERE id = :game_id)"
+            ") WITH ORDINALITY"
+        ),
+        {"game_id": game_id},
+    )
+    session.execute(
+        update(GameSessions)
+        .where(GameSessions.id == game_id)
+        .values(stories=[], updated_at=GameSessions.updated_at)
+    )
+    print(f"Migrated {offset} scenes of game session {game_id}")
+
+
+if __name__ == "__main__":
+    from app.db_setup import get_sync_db, init_db
+
+    init_db()
+    session = next(get_sync_db())
+    try:
+        count = migrate_scenes(session)
+        print(f"Migrated {count} game sessions successfully!")
+    except Exception as e:
+        session.rollback()
+        print(f"Error migrating scenes: {str(e)}")
+    finally:
+        session.close()
@@ -0,0 +1,179 @@
+"""
+Process-wide cache of starting stories and adventure categories.
+
+Starting stories are seed data written by fill_db and never change while the
+API runs, so every worker loads them once at startup and serves them from
+memory. Each response body is rendered to JSON once, together with a strong
+ETag of its bytes.
+
+fill_db bumps the "starting_stories" row in seed_versions when it reseeds.
+The cache compares that version at most every
+STARTING_STORY_CACHE_CHECK_SECONDS and reloads everything when it changed,
+so a reseed reaches every worker without a restart.
+"""
+
+# External imports
+from typing import Any, Dict, List, NamedTuple, Optional
+import asyncio
+import hashlib
+import json
+import time
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Internal imports
+from app.settings import settings
+from app.db_setup import get_session
+from app.api.logger.loggable import Loggable
+from app.api.v1.database.models import (
+    AdventureCategories,
+    SeedVersions,
+    StartingStories,
+)
+from app.api.v1.storage.image_store import image_url
+
+STARTING_STORIES_SEED = "starting_stories"
+
+
+class CachedResponse(NamedTuple):
+    """A response body rendered once, and the strong ETag of its bytes"""
+
+    data: Any
+    body: bytes
+    etag: str
+
+
+def render(data: Any) -> CachedResponse:
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    return CachedResponse(data, body, etag)
+
+
+class StartingStoryCache(Loggable):
+    """Starting stories by id and the category list of one seed version"""
+
+    def __init__(self, check_interval: float = None):
+        super().__init__()
+        self.check_interval = (
+            check_interval
+            if check_interval is not None
+            else settings.STARTING_STORY_CACHE_CHECK_SECONDS
+        )
+        self.version: Optional[int] = None
+        self.stories: Dict[int, CachedResponse] = {}
+        self.categories: Optional[CachedResponse] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get_story(
+        self, db: AsyncSession, story_id: int
+    ) -> Optional[CachedResponse]:
+        await self.refresh(db)
+        return self.stories.get(story_id)
+
+    async def get_categories(self, db: AsyncSession) -> CachedResponse:
+        await self.refresh(db)
+        return self.categories
+
+    async def refresh(self, db: AsyncSession):
+        """
+        Reloads the cache if it is empty or the seed version has changed.
+        The version is only queried once per check_interval, so almost
+        every call returns without touching the database.
+        """
+        if (
+            self.version is not None
+            and time.monotonic() - self._checked_at < self.check_interval
+        ):
+            return
+        async with self._lock:
+            if (
+                self.version is not None
+                and time.monotonic() - self._checked_at < self.check_interval
+            ):
+                return
+            version = await self._get_version(db)
+            if version != self.version:
+                await self.load(db, version)
+            self._checked_at = time.monotonic()
+
+    async def load(self, db: AsyncSession, version: int = None):
+        """Loads every starting story and category"""
+        if version is None:
+            version = await self._get_version(db)
+        stories = (await db.execute(select(StartingStories))).scalars().all()
+        categories = (
+            (
+                await db.execute(
+                    select(AdventureCategories).order_by(
+                        AdventureCategories.id
+                    )
+                )
+            )
+            .scalars()
+            .all()
+        )
+
+        stories_by_category: Dict[int, List[Dict[str, Any]]] = {}
+        cached_stories = {}
+        for story in sorted(stories, key=lambda s: s.id):
+            if story.story is None:
+                continue
+            cached_stories[story.id] = render(
+                {
+                    "image": None if story.image_id else story.image,
+                    "image_id": story.image_id,
+                    "image_url": image_url(story.image_id, "full"),
+                    "thumbnail_url": image_url(story.image_id, "thumb"),
+                    "story": story.story,
+                    "id": story.id,
+                    "category_id": story.category_id,
+                }
+            )
+            stories_by_category.setdefault(story.category_id, []).append(
+                {
+                    "id": story.id,
+                    "thumbnail_url": image_url(story.image_id, "thumb"),
+                }
+            )
+
+        self.stories = cached_stories
+        self.categories = render(
+            [
+                {
+                    "id": category.id,
+                    "name": category.name,
+                    "stories": stories_by_category.get(category.id, []),
+                }
+                for category in categories
+            ]
+        )
+        self.version = version
+        self.logger.info(
+            f"Cached {len(cached_stories)} starting stories and "
+            f"{len(categories)} categories (seed version {version})"
+        )
+
+    async def _get_version(self, db: AsyncSession) -> int:
+        stmt = select(SeedVersions.version).where(
+            SeedVersions.name == STARTING_STORIES_SEED
+        )
+        return (await db.execute(stmt)).scalar_one_or_none() or 0
+
+    async def start(self):
+        """Preloads the cache. Called once at startup."""
+        try:
+            async with get_session() as db:
+                await self.refresh(db)
+        except Exception as e:
+            self.logger.error(f"Could not preload starting stories: {str(e)}")
+
+    def clear(self):
+        self.version = None
+        self.stories = {}
+        self.categories = None
+
+
+starting_story_cache = StartingStoryCache()
@@ -0,0 +1,75 @@
+"""
+Process-wide cache of validated authorization tokens.
+
+Validating a token is a query on the tokens table, and it happens on every
+authenticated request. The cache maps token -> user_id for a short TTL so
+most requests skip that query. Every code path that deletes tokens
+(DatabaseOperations.logout_user and through it _create_access_token,
+deactivate_user and hard_delete_user) calls invalidate_user, so a logged out
+token stops working on this worker immediately.
+
+NOTE: Other workers keep a cached token until its TTL runs out.
+Keep TOKEN_CACHE_TTL_SECONDS short.
+"""
+
+# External imports
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+from uuid import UUID
+import time
+
+# Internal imports
+from app.settings import settings
+
+
+class TokenCache:
+    """Bounded LRU cache with a TTL per entry"""
+
+    def __init__(self, max_size: int = None, ttl: float = None):
+        self.max_size = max_size or settings.TOKEN_CACHE_MAX_SIZE
+        self.ttl = ttl if ttl is not None else settings.TOKEN_CACHE_TTL_SECONDS
+        self._entries: "OrderedDict[str, Tuple[UUID, float]]" = OrderedDict()
+        self._tokens_by_user: Dict[UUID, Set[str]] = {}
+
+    def get(self, token: str) -> Optional[UUID]:
+        """Returns the cached user_id, or None if missing or expired"""
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        user_id, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(token)
+            return None
+        self._entries.move_to_end(token)
+        return user_id
+
+    def set(self, token: str, user_id: UUID):
+        if self.ttl <= 0:
+            return
+        if token in self._entries:
+            self._remove(token)
+        self._entries[token] = (user_id, time.monotonic() + self.ttl)
+        self._tokens_by_user.setdefault(user_id, set()).add(token)
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def invalidate_user(self, user_id: UUID):
+        """Drops every cached token that belongs to user_id"""
+        for token in self._tokens_by_user.pop(user_id, set()):
+            self._entries.pop(token, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._tokens_by_user.clear()
+
+    def _remove(self, token: str):
+        user_id, _ = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+
+token_cache = TokenCache()
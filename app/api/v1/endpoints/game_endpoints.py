@@ -1,14 +1,24 @@
 # External imports
-from fastapi import APIRouter, Depends, Request
-from typing import Dict, List
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
+import json
 
 # Internal imports
 from app.db_setup import get_db
+from app.settings import settings
 from app.api.logger.logger import get_logger
 from app.api.v1.game.game_loop import SceneGenerator
 from app.api.v1.database.operations import DatabaseOperations
+from app.api.v1.database.starting_story_cache import CachedResponse
+from app.api.v1.game.speculative_scenes import speculative_scenes
+from app.api.v1.game.turn_sessions import (
+    next_session,
+    turn_sessions,
+    with_action,
+)
 from app.api.v1.endpoints.token_validation import get_token, requires_auth
 from app.api.v1.endpoints.rate_limiting import rate_limit
 from app.api.v1.validation.schemas import (
@@ -16,25 +26,66 @@ from app.api.v1.validation.schemas import (
     StoryActionSegment,
     GameSession,
     SaveGame,
+    TurnRequest,
 )
 
 logger = get_logger("app.api.endpoints.game")
 router = APIRouter(tags=["game"])
 
 
+class CachedJSONResponse(JSONResponse):
+    """JSONResponse for a body that was already rendered to JSON"""
+
+    def render(self, content: bytes) -> bytes:
+        return content
+
+
+def cached_response(request: Request, cached: CachedResponse) -> Response:
+    """
+    Returns a cached body with its ETag, or 304 if the client has it.
+    Seed data only changes on a reseed, so clients may reuse it for
+    STARTING_STORY_MAX_AGE_SECONDS without asking.
+    """
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": (
+            f"private, max-age={settings.STARTING_STORY_MAX_AGE_SECONDS}"
+        ),
+    }
+    if request.method == "GET" and cached.etag in request.headers.get(
+        "if-none-match", ""
+    ):
+        return Response(status_code=304, headers=headers)
+    return CachedJSONResponse(cached.body, headers=headers)
+
+
+async def sse_events(
+    events: AsyncIterator[Tuple[str, Dict[str, Any]]],
+) -> AsyncIterator[str]:
+    """Formats (event, data) pairs as Server-Sent Events"""
+    async for event, data in events:
+        yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def remember_scene(
+    user_id: UUID, game_session: GameSession, scene: Dict[str, Any]
+):
+    """Keeps the session a scene was generated from for the next turn"""
+    turn_sessions.set(user_id, next_session(game_session, scene))
+    speculative_scenes.remember(user_id, game_session, scene)
+
+
 @router.post("/fetch_story")
 @requires_auth(get_id=True)
 @rate_limit(authenticated_limit=10, unauthenticated_limit=10)
 async def fetch_story(
     request: Request,
     story: StartingStory,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(get_token),
     user_id: UUID = None,
 ):
-    """Fetches a starting story from the database."""
-    from fastapi import HTTPException
-
+    """Fetches a starting story."""
     raise HTTPException(
         status_code=500,
         detail="Fetching stories is not available at this time",
@@ -43,9 +94,23 @@ async def fetch_story(
         f"User ID: {str(user_id)[:5]}... "
         "was granted access to /fetch_story"
     )
-    response = DatabaseOperations(db).get_start_story(story.story_id)
+    cached = await DatabaseOperations(db).get_start_story(story.story_id)
     logger.info("Returning starting story to client")
-    return response
+    return cached_response(request, cached)
+
+
+@router.get("/categories")
+@requires_auth(get_id=True)
+@rate_limit(authenticated_limit=30, unauthenticated_limit=30)
+async def get_categories(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(get_token),
+    user_id: UUID = None,
+):
+    """Lists the adventure categories and the starting stories in each."""
+    cached = await DatabaseOperations(db).get_categories()
+    return cached_response(request, cached)
 
 
 @router.post("/roll_dice")
@@ -54,16 +119,27 @@ async def fetch_story(
 async def roll_dice(
     request: Request,
     story: StoryActionSegment,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(get_token),
     user_id: UUID = None,
 ) -> Dict[str, str | int | bool]:
-    """Rolls dice on a story/action segment"""
+    """
+    Rolls dice on a story/action segment. With SPECULATIVE_SCENES the next
+    scene starts generating right away, see speculative_scenes.
+    """
     logger.info(
         f"User ID: {str(user_id)[:5]}... " "was granted access to /roll_dice"
     )
-    dice_info = await SceneGenerator(db).get_dice_info(story)
+    generator = SceneGenerator(db)
+    dice_info = await generator.get_dice_info(story)
     logger.info(f"Dice rolled: {dice_info}")
+    speculative_scenes.speculate(
+        user_id,
+        story.story,
+        story.action,
+        dice_info["dice_success"],
+        generator.get_next_scene,
+    )
     return dice_info
 
 
@@ -73,27 +149,134 @@ async def roll_dice(
 async def generate_new_scene(
     request: Request,
     game_session: GameSession,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(get_token),
     user_id: UUID = None,
-) -> Dict[str, str]:
+) -> Dict[str, Any]:
     """Generates a new scene based on the previous one."""
     logger.info(
         f"User ID: {str(user_id)[:5]}... "
         "was granted access to /generate_new_scene"
     )
-    scene = await SceneGenerator(db).get_next_scene(game_session)
+    scene = await speculative_scenes.take(user_id, game_session)
+    if scene is None:
+        scene = await SceneGenerator(db).get_next_scene(game_session)
+    else:
+        logger.info("Using speculatively generated scene.")
+    remember_scene(user_id, game_session, scene)
     logger.info("Successfully generated new scene.")
     return scene
 
 
+@router.post("/generate_new_scene/stream")
+@requires_auth(get_id=True)
+@rate_limit(authenticated_limit=6, unauthenticated_limit=6)
+async def stream_new_scene(
+    request: Request,
+    game_session: GameSession,
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(get_token),
+    user_id: UUID = None,
+) -> StreamingResponse:
+    """
+    Generates a new scene like /generate_new_scene, but streams it as
+    Server-Sent Events. "story" events carry the story as it is written,
+    followed by "compressed_story", "music" and "image" events as each
+    stage finishes, and a final "done" event with the whole scene except
+    the base64 image, which the "image" event already carried. A failure
+    ends the stream with an "error" event.
+    """
+    logger.info(
+        f"User ID: {str(user_id)[:5]}... "
+        "was granted access to /generate_new_scene/stream"
+    )
+
+    async def events():
+        async for event, data in SceneGenerator(db).stream_next_scene(
+            game_session
+        ):
+            if event == "done":
+                remember_scene(user_id, game_session, data)
+            yield event, data
+
+    return StreamingResponse(
+        sse_events(events()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/turn")
+@requires_auth(get_id=True)
+@rate_limit(authenticated_limit=6, unauthenticated_limit=6)
+async def play_turn(
+    request: Request,
+    turn: TurnRequest,
+    stream: bool = Query(False),
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(get_token),
+    user_id: UUID = None,
+):
+    """
+    Plays one turn: rolls the dice on the action and generates the next
+    scene, in one request. Returns {"dice": ..., "scene": ...}, or with
+    stream=true the events of /generate_new_scene/stream after a "dice"
+    event.
+
+    The session is kept on the server after every scene, so only the
+    action has to be sent. Send game_session to start, load or resync a
+    game; its last scene is the one the action is taken on. Answers 409
+    when there is no kept session to play on.
+    """
+    logger.info(f"User ID: {str(user_id)[:5]}... was granted access to /turn")
+    game_session = turn.game_session or turn_sessions.get(user_id)
+    if game_session is None or not game_session.scenes:
+        raise HTTPException(
+            status_code=409,
+            detail="No game session to play on, send game_session",
+        )
+    generator = SceneGenerator(db)
+
+    if stream:
+
+        async def events():
+            dice_success = None
+            async for event, data in generator.stream_turn(
+                game_session, turn.action
+            ):
+                if event == "dice":
+                    dice_success = data["dice_success"]
+                elif event == "done":
+                    remember_scene(
+                        user_id,
+                        with_action(game_session, turn.action, dice_success),
+                        data,
+                    )
+                yield event, data
+
+        return StreamingResponse(
+            sse_events(events()),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    dice_info, scene = await generator.play_turn(game_session, turn.action)
+    remember_scene(
+        user_id,
+        with_action(game_session, turn.action, dice_info["dice_success"]),
+        scene,
+    )
+    logger.info("Successfully played turn.")
+    return {"dice": dice_info, "scene": scene}
+
+
 @router.post("/save_game")
 @requires_auth(get_id=True)
 @rate_limit(authenticated_limit=20, unauthenticated_limit=20)
 async def save_game(
     request: Request,
     game: SaveGame,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(get_token),
     user_id: int = None,
 ) -> Dict[str, int]:
@@ -101,7 +284,7 @@ async def save_game(
     logger.info(
         f"User ID: {str(user_id)[:5]}... was granted access to /save_game"
     )
-    game_id = DatabaseOperations(db).save_game_route(game, user_id)
+    game_id = await DatabaseOperations(db).save_game_route(game, user_id)
     return {"game_id": game_id}
 
 
@@ -110,14 +293,72 @@ async def save_game(
 @rate_limit(authenticated_limit=10, unauthenticated_limit=10)
 async def load_game(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(get_token),
     user_id: int = None,
 ):
-    """Loads a game session from the database."""
+    """
+    Loads every game session of the user, including stories and images.
+    Save pickers should use /list_saves and fetch single saves lazily.
+    """
     logger.info(
         f"User ID: {str(user_id)[:5]}... was granted access to /load_game"
     )
-    saves: List[GameSession] = DatabaseOperations(db).load_game(user_id)
+    saves: List[GameSession] = await DatabaseOperations(db).load_game(user_id)
     logger.info("Returning saves to client")
     return {"saves": saves}
+
+
+@router.get("/list_saves")
+@requires_auth(get_id=True)
+@rate_limit(authenticated_limit=20, unauthenticated_limit=20)
+async def list_saves(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(get_token),
+    user_id: UUID = None,
+) -> Dict[str, Any]:
+    """
+    Lists a page of the user's saves without stories or images.
+    Pass next_cursor from the response as cursor to get the next page.
+    """
+    logger.info(
+        f"User ID: {str(user_id)[:5]}... was granted access to /list_saves"
+    )
+    return await DatabaseOperations(db).list_saves(user_id, limit, cursor)
+
+
+@router.get("/load_game/{game_id}")
+@requires_auth(get_id=True)
+@rate_limit(authenticated_limit=10, unauthenticated_limit=10)
+async def load_single_game(
+    request: Request,
+    game_id: int,
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(get_token),
+    user_id: UUID = None,
+) -> Dict[str, Any]:
+    """Loads the full session of one save, without its image."""
+    logger.info(
+        f"User ID: {str(user_id)[:5]}... was granted access to /load_game/{{id}}"
+    )
+    return await DatabaseOperations(db).get_save(user_id, game_id)
+
+
+@router.get("/load_game/{game_id}/image")
+@requires_auth(get_id=True)
+@rate_limit(authenticated_limit=30, unauthenticated_limit=30)
+async def load_game_image(
+    request: Request,
+    game_id: int,
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(get_token),
+    user_id: UUID = None,
+) -> Dict[str, Optional[str]]:
+    """
+    Returns where the last image of one save is served from.
+    Saves from before the image store return the base64 image instead.
+    """
+    return await DatabaseOperations(db).get_save_image(user_id, game_id)
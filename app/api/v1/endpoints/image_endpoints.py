@@ -0,0 +1,77 @@
+# External imports
+from typing import Literal
+from fastapi import APIRouter, Depends, Request, HTTPException
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from PIL import UnidentifiedImageError
+
+# Internal imports
+from app.db_setup import get_db
+from app.api.logger.logger import get_logger
+from app.api.v1.endpoints.rate_limiting import rate_limit
+from app.api.v1.storage.image_store import (
+    get_image_store,
+    is_image_id,
+    variant_key,
+)
+from app.api.v1.storage.image_variants import (
+    MEDIA_TYPES,
+    get_variant,
+    negotiate_format,
+)
+
+logger = get_logger("app.api.endpoints.images")
+router = APIRouter(tags=["images"])
+
+# Content-addressed images never change, so clients may cache them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@router.get("/images/{image_id}")
+@rate_limit(authenticated_limit=120, unauthenticated_limit=120)
+async def get_image(
+    request: Request,
+    image_id: str,
+    variant: Literal["original", "full", "thumb"] = "original",
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Streams an image, or a resized variant of it, from the image store.
+    Variants are served as AVIF, WebP or JPEG depending on the Accept header
+    and are encoded on first request if they are not stored yet.
+    The storage key is derived from the content and doubles as a strong
+    ETag. Range requests are supported for images on the local filesystem.
+    """
+    store = get_image_store()
+    if not is_image_id(image_id) or not store.exists(image_id):
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    key = image_id
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if variant != "original":
+        image_format = negotiate_format(request.headers.get("accept"))
+        key = variant_key(image_id, variant, image_format)
+        headers["Vary"] = "Accept"
+    etag = f'"{key}"'
+    headers["ETag"] = etag
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    if variant == "original":
+        media_type = store.media_type(image_id)
+    else:
+        try:
+            await get_variant(image_id, variant, image_format)
+        except UnidentifiedImageError:
+            raise HTTPException(
+                status_code=422,
+                detail="Image can not be converted",
+            )
+        media_type = MEDIA_TYPES[image_format]
+
+    path = store.local_path(key)
+    if path is not None:
+        return FileResponse(path, media_type=media_type, headers=headers)
+    return StreamingResponse(
+        store.iter_chunks(key), media_type=media_type, headers=headers
+    )
@@ -0,0 +1,409 @@
+"""
+Storage backends for the rate limiter.
+
+Both backends expose check(db, key, limit, window_seconds) and return the
+same rate limit information dict, so rate_limiting.py does not care where
+the counters live.
+
+- DatabaseRateLimitBackend: The original implementation. A list of request
+  timestamps per key in the rate_limits table, read and rewritten on every
+  request.
+
+- InMemoryRateLimitBackend: An approximate sliding window kept in-process.
+  Each key only stores the start of its current window and two counters, so
+  a check is O(1) and never touches the database. The counters are written
+  to rate_limit_counters periodically and read back on startup.
+"""
+
+# External imports
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from datetime import datetime
+import asyncio
+import math
+import time
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Internal imports
+from app.settings import settings
+from app.db_setup import get_session
+from app.api.logger.loggable import Loggable
+from app.api.v1.database.models import RateLimit, RateLimitCounters
+
+# Rows per upsert statement. Each row takes 6 bind parameters, and Postgres
+# allows at most 32767 per statement.
+FLUSH_BATCH_SIZE = 1000
+
+
+async def check_and_update_rate_limit(
+    db: AsyncSession, key: Dict[str, Any], limit: int, window_seconds: int = 60
+) -> Dict[str, Any]:
+    """
+    Checks if a request exceeds the rate limit and updates the database.
+    This function handles cleaning up old timestamps and adding the new timestamp
+    if the request is under the limit.
+
+    Args:
+        db: Database session
+        key: Rate limit key dictionary with user_id/ip_address and endpoint_path
+        limit: Maximum number of requests allowed in the time window
+        window_seconds: Time window in seconds
+
+    Returns:
+        Dict with rate limit information:
+        - exceeded: Whether the rate limit was exceeded
+        - reset_time: Time until the rate limit resets (in seconds)
+        - total: Total limit
+        - remaining: Remaining requests allowed
+    """
+    current_time = int(time.time())
+    cutoff_time = current_time - window_seconds
+    if key["user_id"]:
+        stmt = select(RateLimit).where(
+            RateLimit.user_id == key["user_id"],
+            RateLimit.endpoint_path == key["endpoint_path"],
+        )
+    else:
+        stmt = select(RateLimit).where(
+            RateLimit.ip_address == key["ip_address"],
+            RateLimit.endpoint_path == key["endpoint_path"],
+        )
+
+    result = await db.execute(stmt)
+    rate_limit_record = result.scalar_one_or_none()
+
+    if rate_limit_record:
+        valid_timestamps = [
+            ts for ts in rate_limit_record.requests if ts > cutoff_time
+        ]
+        if len(valid_timestamps) >= limit:
+            if valid_timestamps:
+                oldest_timestamp = min(valid_timestamps)
+                reset_time = oldest_timestamp + window_seconds - current_time
+            else:
+                reset_time = window_seconds
+
+            return {
+                "exceeded": True,
+                "reset_time": max(1, int(reset_time)),
+                "total": limit,
+                "remaining": 0,
+            }
+        valid_timestamps.append(current_time)
+        stmt = (
+            update(RateLimit)
+            .where(RateLimit.id == rate_limit_record.id)
+            .values(requests=valid_timestamps, updated_at=datetime.now())
+        )
+        await db.execute(stmt)
+        await db.commit()
+
+        return {
+            "exceeded": False,
+            "reset_time": window_seconds,
+            "total": limit,
+            "remaining": limit - len(valid_timestamps),
+        }
+    else:
+        new_record = RateLimit(
+            user_id=key["user_id"],
+            ip_address=key["ip_address"],
+            endpoint_path=key["endpoint_path"],
+            requests=[current_time],
+        )
+        db.add(new_record)
+        await db.commit()
+
+        return {
+            "exceeded": False,
+            "reset_time": window_seconds,
+            "total": limit,
+            "remaining": limit - 1,
+        }
+
+
+class RateLimitBackend(Loggable, ABC):
+    """Interface for rate limit storage"""
+
+    @abstractmethod
+    async def check(
+        self,
+        db: AsyncSession,
+        key: Dict[str, Any],
+        limit: int,
+        window_seconds: int = 60,
+    ) -> Dict[str, Any]:
+        """Counts a request for key and returns rate limit information"""
+
+    async def start(self):
+        """Called once at startup"""
+        pass
+
+    async def stop(self):
+        """Called once at shutdown"""
+        pass
+
+
+class DatabaseRateLimitBackend(RateLimitBackend):
+    """Keeps every request timestamp in the rate_limits table"""
+
+    async def check(self, db, key, limit, window_seconds=60):
+        return await check_and_update_rate_limit(
+            db, key, limit, window_seconds
+        )
+
+
+class _WindowCounter:
+    """Counters of one key. __slots__ keeps each entry small."""
+
+    __slots__ = (
+        "window_seconds",
+        "window_start",
+        "current",
+        "previous",
+        "dirty",
+    )
+
+    def __init__(
+        self,
+        window_seconds: int,
+        window_start: int,
+        current: int = 0,
+        previous: int = 0,
+    ):
+        self.window_seconds = window_seconds
+        self.window_start = window_start
+        self.current = current
+        self.previous = previous
+        self.dirty = False
+
+    def roll(self, now: float):
+        """Moves the window forward so that now falls inside it"""
+        elapsed_windows = int((now - self.window_start) // self.window_seconds)
+        if elapsed_windows <= 0:
+            return
+        if elapsed_windows == 1:
+            self.previous = self.current
+        else:
+            self.previous = 0
+        self.current = 0
+        self.window_start += elapsed_windows * self.window_seconds
+
+    def estimate(self, now: float) -> float:
+        """
+        Approximate number of requests during the last window_seconds.
+        The previous window is weighted by how much of it still overlaps.
+        """
+        elapsed = (now - self.window_start) / self.window_seconds
+        return self.previous * (1 - elapsed) + self.current
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Approximate sliding window rate limiter kept in process memory.
+
+    Keys are held in an OrderedDict in least-recently-used order. Keys that
+    have been idle for two windows no longer affect any limit and are evicted
+    from the front, and the oldest key is dropped when max_keys is reached.
+
+    NOTE: Counters are per process. With several workers each worker enforces
+    the limit on its own share of the traffic.
+    """
+
+    def __init__(
+        self,
+        max_keys: int = None,
+        flush_interval: float = None,
+        session_factory=None,
+    ):
+        super().__init__()
+        self.max_keys = max_keys or settings.RATE_LIMIT_MAX_KEYS
+        self.flush_interval = (
+            flush_interval
+            if flush_interval is not None
+            else settings.RATE_LIMIT_FLUSH_INTERVAL_SECONDS
+        )
+        self.session_factory = session_factory
+        self.counters: "OrderedDict[str, _WindowCounter]" = OrderedDict()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _counter_key(key: Dict[str, Any]) -> str:
+        if key["user_id"]:
+            return f"user:{key['user_id']}|{key['endpoint_path']}"
+        return f"ip:{key['ip_address']}|{key['endpoint_path']}"
+
+    async def check(self, db, key, limit, window_seconds=60):
+        now = time.time()
+        counter_key = self._counter_key(key)
+        counter = self.counters.get(counter_key)
+        if counter is None or counter.window_seconds != window_seconds:
+            window_start = int(now // window_seconds) * window_seconds
+            counter = _WindowCounter(window_seconds, window_start)
+            self.counters[counter_key] = counter
+            self._evict(now)
+        else:
+            self.counters.move_to_end(counter_key)
+            counter.roll(now)
+
+        estimate = counter.estimate(now)
+        if estimate + 1 > limit:
+            reset_time = counter.window_start + window_seconds - now
+            return {
+                "exceeded": True,
+                "reset_time": max(1, int(reset_time)),
+                "total": limit,
+                "remaining": 0,
+            }
+        counter.current += 1
+        counter.dirty = True
+        return {
+            "exceeded": False,
+            "reset_time": window_seconds,
+            "total": limit,
+            "remaining": max(0, limit - math.ceil(estimate) - 1),
+        }
+
+    def _evict(self, now: float):
+        """Drops idle keys from the LRU end and enforces max_keys"""
+        while len(self.counters) > self.max_keys:
+            self.counters.popitem(last=False)
+        while self.counters:
+            oldest = next(iter(self.counters.values()))
+            idle_until = oldest.window_start + 2 * oldest.window_seconds
+            if idle_until > now:
+                break
+            self.counters.popitem(last=False)
+
+    def snapshot(self, only_dirty: bool = True) -> Dict[str, Tuple]:
+        """Returns counters as plain tuples and clears their dirty flags"""
+        rows = {}
+        for counter_key, counter in self.counters.items():
+            if only_dirty and not counter.dirty:
+                continue
+            rows[counter_key] = (
+                counter.window_seconds,
+                counter.window_start,
+                counter.current,
+                counter.previous,
+            )
+            counter.dirty = False
+        return rows
+
+    async def flush(self, db: AsyncSession, rows: Dict[str, Tuple]):
+        """
+        Upserts a snapshot into rate_limit_counters, FLUSH_BATCH_SIZE rows
+        per statement, in one transaction
+        """
+        if not rows:
+            return
+        values = [
+            {
+                "key": counter_key,
+                "window_seconds": window_seconds,
+                "window_start": window_start,
+                "current_count": current,
+                "previous_count": previous,
+                "updated_at": datetime.now(),
+            }
+            for counter_key, (
+                window_seconds,
+                window_start,
+                current,
+                previous,
+            ) in rows.items()
+        ]
+        for start in range(0, len(values), FLUSH_BATCH_SIZE):
+            stmt = pg_insert(RateLimitCounters).values(
+                values[start : start + FLUSH_BATCH_SIZE]
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[RateLimitCounters.key],
+                set_={
+                    "window_seconds": stmt.excluded.window_seconds,
+                    "window_start": stmt.excluded.window_start,
+                    "current_count": stmt.excluded.current_count,
+                    "previous_count": stmt.excluded.previous_count,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+            await db.execute(stmt)
+        await db.commit()
+        self.logger.debug(f"Flushed {len(rows)} rate limit counters")
+
+    async def restore(self, db: AsyncSession):
+        """Loads counters that are still relevant from rate_limit_counters"""
+        now = time.time()
+        stmt = select(RateLimitCounters).where(
+            RateLimitCounters.window_start
+            + 2 * RateLimitCounters.window_seconds
+            > int(now)
+        )
+        rows = (await db.execute(stmt)).scalars().all()
+        for row in rows:
+            counter = _WindowCounter(
+                row.window_seconds,
+                row.window_start,
+                row.current_count,
+                row.previous_count,
+            )
+            counter.roll(now)
+            self.counters[row.key] = counter
+        self.logger.info(f"Restored {len(rows)} rate limit counters")
+
+    async def start(self):
+        if self.session_factory is None:
+            return
+        try:
+            async with self.session_factory() as db:
+                await self.restore(db)
+        except Exception as e:
+            self.logger.error(f"Could not restore rate limits: {str(e)}")
+        if self.flush_interval > 0:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        if self.session_factory is not None:
+            await self._flush_once()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._flush_once()
+
+    async def _flush_once(self):
+        rows = self.snapshot()
+        if not rows:
+            return
+        try:
+            async with self.session_factory() as db:
+                await self.flush(db, rows)
+        except Exception as e:
+            self.logger.error(f"Could not flush rate limits: {str(e)}")
+            for counter_key in rows:
+                if counter_key in self.counters:
+                    self.counters[counter_key].dirty = True
+
+
+_backend: Optional[RateLimitBackend] = None
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    """Returns the backend selected by RATE_LIMIT_BACKEND"""
+    global _backend
+    if _backend is None:
+        if settings.RATE_LIMIT_BACKEND == "database":
+            _backend = DatabaseRateLimitBackend()
+        else:
+            _backend = InMemoryRateLimitBackend(session_factory=get_session)
+    return _backend
@@ -2,18 +2,16 @@
 from functools import wraps
 from typing import Callable, Optional, Dict, Any
 import time
-from datetime import datetime
 from fastapi import HTTPException, Request, status, Depends, Security
 from fastapi.responses import JSONResponse
 from fastapi.security import APIKeyHeader
-from sqlalchemy import select, update
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
 # Internal imports
 from app.api.logger.logger import get_logger
-from app.api.v1.database.models import RateLimit
 from app.db_setup import get_db
+from app.api.v1.endpoints.rate_limit_backends import get_rate_limit_backend
 from app.api.v1.endpoints.token_validation import (
     get_token,
     validate_token,
@@ -60,93 +58,127 @@ def get_rate_limit_key(
         }
 
 
-def check_and_update_rate_limit(
-    db: Session, key: Dict[str, Any], limit: int, window_seconds: int = 60
-) -> Dict[str, Any]:
+class RateLimitPolicy:
     """
-    Checks if a request exceeds the rate limit and updates the database.
-    This function handles cleaning up old timestamps and adding the new timestamp
-    if the request is under the limit.
+    The rate limit of one endpoint, compiled once when the route is registered.
+
+    The decorators and dependency factories below build a policy when they
+    are applied, so the per-request path only resolves the caller, asks the
+    backend and fills in the reset time. Header values that only depend on
+    the policy are precomputed.
 
     Args:
-        db: Database session
-        key: Rate limit key dictionary with user_id/ip_address and endpoint_path
-        limit: Maximum number of requests allowed in the time window
+        authenticated_limit: Maximum requests per window for authenticated users
+        unauthenticated_limit: Maximum requests per window for unauthenticated users
         window_seconds: Time window in seconds
-
-    Returns:
-        Dict with rate limit information:
-        - exceeded: Whether the rate limit was exceeded
-        - reset_time: Time until the rate limit resets (in seconds)
-        - total: Total limit
-        - remaining: Remaining requests allowed
+        authenticated_only: Only use the user_id set by requires_auth,
+            never parse the Authorization header
     """
-    current_time = int(time.time())
-    cutoff_time = current_time - window_seconds
-    if key["user_id"]:
-        stmt = select(RateLimit).where(
-            RateLimit.user_id == key["user_id"],
-            RateLimit.endpoint_path == key["endpoint_path"],
-        )
-    else:
-        stmt = select(RateLimit).where(
-            RateLimit.ip_address == key["ip_address"],
-            RateLimit.endpoint_path == key["endpoint_path"],
-        )
-
-    result = db.execute(stmt)
-    rate_limit_record = result.scalar_one_or_none()
-
-    if rate_limit_record:
-        valid_timestamps = [
-            ts for ts in rate_limit_record.requests if ts > cutoff_time
-        ]
-        if len(valid_timestamps) >= limit:
-            if valid_timestamps:
-                oldest_timestamp = min(valid_timestamps)
-                reset_time = oldest_timestamp + window_seconds - current_time
-            else:
-                reset_time = window_seconds
-
-            return {
-                "exceeded": True,
-                "reset_time": max(1, int(reset_time)),
-                "total": limit,
-                "remaining": 0,
-            }
-        valid_timestamps.append(current_time)
-        stmt = (
-            update(RateLimit)
-            .where(RateLimit.id == rate_limit_record.id)
-            .values(requests=valid_timestamps, updated_at=datetime.now())
-        )
-        db.execute(stmt)
-        db.commit()
 
-        return {
-            "exceeded": False,
-            "reset_time": window_seconds,
-            "total": limit,
-            "remaining": limit - len(valid_timestamps),
+    __slots__ = (
+        "authenticated_limit",
+        "unauthenticated_limit",
+        "window_seconds",
+        "authenticated_only",
+        "_limit_headers",
+    )
+
+    def __init__(
+        self,
+        authenticated_limit: int = 100,
+        unauthenticated_limit: int = 20,
+        window_seconds: int = 60,
+        authenticated_only: bool = False,
+    ):
+        self.authenticated_limit = authenticated_limit
+        self.unauthenticated_limit = unauthenticated_limit
+        self.window_seconds = window_seconds
+        self.authenticated_only = authenticated_only
+        self._limit_headers = {
+            True: str(authenticated_limit),
+            False: str(unauthenticated_limit),
         }
-    else:
-        new_record = RateLimit(
-            user_id=key["user_id"],
-            ip_address=key["ip_address"],
-            endpoint_path=key["endpoint_path"],
-            requests=[current_time],
-        )
-        db.add(new_record)
-        db.commit()
 
-        return {
-            "exceeded": False,
-            "reset_time": window_seconds,
-            "total": limit,
-            "remaining": limit - 1,
+    async def resolve_user_id(
+        self,
+        request: Request,
+        db: AsyncSession,
+        auth_header: Optional[str] = None,
+    ) -> Optional[UUID]:
+        """Returns the caller's user_id, or None for anonymous requests"""
+        # Set by requires_auth when it already validated the token
+        user_id = getattr(request.state, "user_id", None)
+        if user_id is not None or self.authenticated_only:
+            return user_id
+        if auth_header is None:
+            auth_header = request.headers.get("authorization")
+        if not auth_header:
+            return None
+        try:
+            token = get_token(auth_header, None)
+            user_id = await validate_token(token, db, get_id=True)
+            request.state.user_id = user_id
+        except Exception as e:
+            logger.warning(f"Authentication check failed: {str(e)}")
+        return user_id
+
+    async def enforce(
+        self,
+        request: Request,
+        db: AsyncSession,
+        auth_header: Optional[str] = None,
+    ):
+        """
+        Counts the request and raises a 429 if the limit is exceeded.
+        Stores the rate limit information in request.state.rate_limit_info.
+        """
+        user_id = await self.resolve_user_id(request, db, auth_header)
+        if user_id is None and self.authenticated_only:
+            logger.warning(
+                "No user_id found in request state. This rate limiter should be used after authentication."
+            )
+        authenticated = self.authenticated_only or user_id is not None
+        limit = (
+            self.authenticated_limit
+            if authenticated
+            else self.unauthenticated_limit
+        )
+        rate_limit_info = await get_rate_limit_backend().check(
+            db=db,
+            key=get_rate_limit_key(request, user_id),
+            limit=limit,
+            window_seconds=self.window_seconds,
+        )
+        now = time.time()
+        if rate_limit_info["exceeded"]:
+            reset_time = rate_limit_info["reset_time"]
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers={
+                    "Retry-After": str(reset_time),
+                    "X-RateLimit-Limit": self._limit_headers[authenticated],
+                    "X-RateLimit-Remaining": "0",
+                    "X-RateLimit-Reset": str(int(now + reset_time)),
+                },
+            )
+        request.state.rate_limit_info = {
+            "limit": limit,
+            "remaining": rate_limit_info["remaining"],
+            "reset": int(now + self.window_seconds),
         }
 
 
+def _set_rate_limit_headers(request: Request, response):
+    """Copies request.state.rate_limit_info onto a JSONResponse"""
+    info = getattr(request.state, "rate_limit_info", None)
+    if info is None or not isinstance(response, JSONResponse):
+        return
+    response.headers["X-RateLimit-Limit"] = str(info["limit"])
+    response.headers["X-RateLimit-Remaining"] = str(info["remaining"])
+    response.headers["X-RateLimit-Reset"] = str(info["reset"])
+
+
 def create_rate_limiter(
     authenticated_limit: int = 100,
     unauthenticated_limit: int = 20,
@@ -160,7 +192,7 @@ def create_rate_limiter(
     @router.get("/public-endpoint")
     async def public_endpoint(
         request: Request,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         _: None = Depends(create_rate_limiter(100, 20))
     ):
         return {"message": "Rate-limited endpoint"}
@@ -174,45 +206,16 @@ def create_rate_limiter(
         A dependency function for rate limiting
     """
 
+    policy = RateLimitPolicy(
+        authenticated_limit, unauthenticated_limit, window_seconds
+    )
+
     async def rate_limiter(
         request: Request,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         auth_header: Optional[str] = Security(authorization_header),
     ):
-        user_id = None
-        try:
-            if auth_header:
-                token = get_token(auth_header, None)
-                if token:
-                    user_id = validate_token(token, db, get_id=True)
-                    request.state.user_id = user_id
-        except Exception as e:
-            logger.warning(f"Authentication check failed: {str(e)}")
-        limit = authenticated_limit if user_id else unauthenticated_limit
-        rate_limit_key = get_rate_limit_key(request, user_id)
-        rate_limit_info = check_and_update_rate_limit(
-            db=db,
-            key=rate_limit_key,
-            limit=limit,
-            window_seconds=window_seconds,
-        )
-        if rate_limit_info["exceeded"]:
-            reset_time = rate_limit_info["reset_time"]
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="Rate limit exceeded",
-                headers={
-                    "Retry-After": str(reset_time),
-                    "X-RateLimit-Limit": str(limit),
-                    "X-RateLimit-Remaining": "0",
-                    "X-RateLimit-Reset": str(int(time.time() + reset_time)),
-                },
-            )
-        request.state.rate_limit_info = {
-            "limit": limit,
-            "remaining": rate_limit_info["remaining"],
-            "reset": int(time.time() + window_seconds),
-        }
+        await policy.enforce(request, db, auth_header)
         return None
 
     return rate_limiter
@@ -232,7 +235,7 @@ def create_authenticated_rate_limiter(
     @requires_auth(get_id=True)
     async def user_endpoint(
         request: Request,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         token: str = Depends(get_token),
         user_id: UUID = None,
         _: None = Depends(create_authenticated_rate_limiter(100))
@@ -247,40 +250,18 @@ def create_authenticated_rate_limiter(
         A dependency function for rate limiting authenticated requests
     """
 
+    policy = RateLimitPolicy(
+        authenticated_limit,
+        authenticated_limit,
+        window_seconds,
+        authenticated_only=True,
+    )
+
     async def auth_rate_limiter(
         request: Request,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
     ):
-        user_id = getattr(request.state, "user_id", None)
-
-        if user_id is None:
-            logger.warning(
-                "No user_id found in request state. This rate limiter should be used after authentication."
-            )
-        rate_limit_key = get_rate_limit_key(request, user_id)
-        rate_limit_info = check_and_update_rate_limit(
-            db=db,
-            key=rate_limit_key,
-            limit=authenticated_limit,
-            window_seconds=window_seconds,
-        )
-        if rate_limit_info["exceeded"]:
-            reset_time = rate_limit_info["reset_time"]
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="Rate limit exceeded",
-                headers={
-                    "Retry-After": str(reset_time),
-                    "X-RateLimit-Limit": str(authenticated_limit),
-                    "X-RateLimit-Remaining": "0",
-                    "X-RateLimit-Reset": str(int(time.time() + reset_time)),
-                },
-            )
-        request.state.rate_limit_info = {
-            "limit": authenticated_limit,
-            "remaining": rate_limit_info["remaining"],
-            "reset": int(time.time() + window_seconds),
-        }
+        await policy.enforce(request, db)
         return None
 
     return auth_rate_limiter
@@ -321,7 +302,7 @@ def rate_limit(
     Example:
         @router.get("/public-endpoint")
         @rate_limit(authenticated_limit=100, unauthenticated_limit=20)
-        async def public_endpoint(request: Request, db: Session = Depends(get_db)):
+        async def public_endpoint(request: Request, db: AsyncSession = Depends(get_db)):
             return {"message": "This is a public endpoint"}
 
     Args:
@@ -334,24 +315,20 @@ def rate_limit(
     """
 
     def decorator(func: Callable):
+        policy = RateLimitPolicy(
+            authenticated_limit, unauthenticated_limit, window_seconds
+        )
+
         @wraps(func)
         async def wrapper(
-            request: Request, db: Session = Depends(get_db), *args, **kwargs
+            request: Request,
+            db: AsyncSession = Depends(get_db),
+            *args,
+            **kwargs,
         ):
-            rate_limiter = create_rate_limiter(
-                authenticated_limit, unauthenticated_limit, window_seconds
-            )
-            await rate_limiter(request, db)
+            await policy.enforce(request, db)
             response = await func(request, db=db, *args, **kwargs)
-            if isinstance(response, JSONResponse) and hasattr(
-                request.state, "rate_limit_info"
-            ):
-                info = request.state.rate_limit_info
-                response.headers["X-RateLimit-Limit"] = str(info["limit"])
-                response.headers["X-RateLimit-Remaining"] = str(
-                    info["remaining"]
-                )
-                response.headers["X-RateLimit-Reset"] = str(info["reset"])
+            _set_rate_limit_headers(request, response)
             return response
 
         return wrapper
@@ -378,7 +355,7 @@ def optimized_rate_limit_with_auth(
         @optimized_rate_limit_with_auth(authenticated_limit=100)
         async def protected_endpoint(
             request: Request,
-            db: Session = Depends(get_db),
+            db: AsyncSession = Depends(get_db),
             token: str = Depends(get_token),
             user_id: UUID = None,
         ):
@@ -393,27 +370,24 @@ def optimized_rate_limit_with_auth(
     """
 
     def decorator(func: Callable):
+        policy = RateLimitPolicy(
+            authenticated_limit,
+            authenticated_limit,
+            window_seconds,
+            authenticated_only=True,
+        )
+
         @wraps(func)
         async def wrapper(
-            request: Request, db: Session = Depends(get_db), *args, **kwargs
+            request: Request,
+            db: AsyncSession = Depends(get_db),
+            *args,
+            **kwargs,
         ):
-            user_id = kwargs.get("user_id")
-            request.state.user_id = user_id
-            auth_rate_limiter = create_authenticated_rate_limiter(
-                authenticated_limit, window_seconds
-            )
-            await auth_rate_limiter(request, db)
+            request.state.user_id = kwargs.get("user_id")
+            await policy.enforce(request, db)
             response = await func(request, db=db, *args, **kwargs)
-            if isinstance(response, JSONResponse) and hasattr(
-                request.state, "rate_limit_info"
-            ):
-                info = request.state.rate_limit_info
-                response.headers["X-RateLimit-Limit"] = str(info["limit"])
-                response.headers["X-RateLimit-Remaining"] = str(
-                    info["remaining"]
-                )
-                response.headers["X-RateLimit-Reset"] = str(info["reset"])
-
+            _set_rate_limit_headers(request, response)
             return response
 
         return wrapper
@@ -423,7 +397,7 @@ def optimized_rate_limit_with_auth(
 
 async def example_public_endpoint_with_dependency(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: None = Depends(create_rate_limiter(50, 5)),
 ):
     """This is a test endpoint demonstrating rate limiting with dependencies."""
@@ -432,7 +406,7 @@ async def example_public_endpoint_with_dependency(
 
 @rate_limit(authenticated_limit=50, unauthenticated_limit=5)
 async def example_public_endpoint(
-    request: Request, db: Session = Depends(get_db)
+    request: Request, db: AsyncSession = Depends(get_db)
 ):
     """This is a test endpoint demonstrating rate limiting with decorators."""
     return {"message": "Hello, world!"}
@@ -441,25 +415,23 @@ async def example_public_endpoint(
 """
 IMPORTANT DISTRIBUTED DEPLOYMENT CONSIDERATIONS:
 
-This database-backed implementation works across distributed environments with some considerations:
+The storage is selected with RATE_LIMIT_BACKEND (see rate_limit_backends.py).
 
-1. Database Performance:
+1. "memory" (default):
+   - Counters live in the worker process, so a check costs no database I/O
+   - Counters are flushed to rate_limit_counters every
+     RATE_LIMIT_FLUSH_INTERVAL_SECONDS and restored on startup
+   - Every worker enforces the limit on its own, so with N workers a client
+     can in the worst case make N times the limit. Sticky sessions or a
+     shared store (Redis/Memcached) would be needed to tighten this.
+
+2. "database":
    - Each request requires database reads and writes for rate limiting
+   - Limits are exact across all workers and instances
    - High-traffic applications should monitor database performance
-   - Consider database connection pooling and query optimization
-
-2. Alternative Considerations:
-   - Sticky sessions could still be beneficial for performance reasons
-   - For extremely high traffic, a dedicated caching layer (Redis/Memcached) could offload the database
-   - A separate rate limiting service could be used for very large deployments
 
 3. Scaling Recommendations:
-   - Start with this implementation as it's robust and secure
-   - Monitor database performance under load
-   - Consider database optimizations (indexes, etc.) if needed
+   - The in-memory backend is accurate enough for abuse protection
+   - Switch to the database backend when limits must hold across instances
    - Only introduce additional complexity when proven necessary by metrics
-
-This implementation addresses the core security concerns by providing proper rate limiting
-tied to user identity, preventing authentication bypass, and ensuring consistent
-enforcement across distributed application instances.
 """
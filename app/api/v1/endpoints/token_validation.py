@@ -10,18 +10,25 @@ from functools import wraps
 
 # Internal imports
 from app.api.logger.logger import get_logger
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.v1.database.operations import DatabaseOperations
+from app.api.v1.database.token_cache import token_cache
 
 
 security = HTTPBearer()
 logger = get_logger("app.api.endpoints.token_validation")
 
 
-def validate_token(token: str, db: Session, get_id: bool = False):
-    """Validates the token and optionally returns the user id"""
+async def validate_token(token: str, db: AsyncSession, get_id: bool = False):
+    """
+    Validates the token and optionally returns the user id.
+    Tokens validated within TOKEN_CACHE_TTL_SECONDS are served from the cache.
+    """
     logger.info("Validating token")
-    user_id = DatabaseOperations(db).validate_token(token)
+    user_id = token_cache.get(token)
+    if user_id is None:
+        user_id = await DatabaseOperations(db).validate_token(token)
+        token_cache.set(token, user_id)
     if get_id:
         logger.info(
             f"Token validated, returning user id: {str(user_id)[:5]}..."
@@ -54,6 +61,9 @@ def requires_auth(get_id: bool = False):
     """
     A simple decorator that handles token validation inside the endpoint.
 
+    The resolved user_id is also stored in request.state.user_id so the
+    rate limiter below it does not have to validate the token again.
+
     Args:
         get_id: If True, the user_id will be returned and passed to the function.
     """
@@ -63,7 +73,10 @@ def requires_auth(get_id: bool = False):
         async def wrapper(*args, **kwargs):
             token = kwargs.get("token")
             db = kwargs.get("db")
-            user_id = validate_token(token, db, get_id=True)
+            user_id = await validate_token(token, db, get_id=True)
+            request = kwargs.get("request")
+            if request is not None:
+                request.state.user_id = user_id
             kwargs.pop("token", None)
             if get_id:
                 kwargs["user_id"] = user_id
@@ -1,7 +1,7 @@
 # External imports
 from typing import Dict, Any
 from fastapi import APIRouter, Depends, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
 # Internal imports
@@ -29,11 +29,11 @@ router = APIRouter(tags=["users"])
 @router.post("/register")
 @rate_limit(authenticated_limit=6, unauthenticated_limit=6)
 async def register_user(
-    request: Request, user: UserCreate, db: Session = Depends(get_db)
+    request: Request, user: UserCreate, db: AsyncSession = Depends(get_db)
 ):
     """Creates a email token in the database"""
     logger.info(f"Registering new user with email: {str(user.email)[:5]}...")
-    token = DatabaseOperations(db).create_email_token(user)
+    token = await DatabaseOperations(db).create_email_token(user)
     EmailServices().send_activation_email(user.email, token)
     return {"message": "Email token created successfully"}
 
@@ -43,7 +43,7 @@ async def register_user(
 async def verify_token(
     request: Request,
     token: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Verify an email token and create a user in db"""
     logger.info(
@@ -52,7 +52,7 @@ async def verify_token(
     token_data = EmailToken(token=token)
     logger.info("Token format validated successfully")
 
-    auth_token = DatabaseOperations(db).create_user(token_data.token)
+    auth_token = await DatabaseOperations(db).create_user(token_data.token)
     logger.info("User created and authenticated successfully")
     return auth_token
 
@@ -60,13 +60,13 @@ async def verify_token(
 @router.post("/login")
 @rate_limit(authenticated_limit=6, unauthenticated_limit=6)
 async def login_user(
-    request: Request, user: UserLogin, db: Session = Depends(get_db)
+    request: Request, user: UserLogin, db: AsyncSession = Depends(get_db)
 ):
     """Login a user with email and password"""
     logger.info(
         f"Login User endpoint requested with email: {str(user.email)[:5]}..."
     )
-    token = DatabaseOperations(db).login_user(user)
+    token = await DatabaseOperations(db).login_user(user)
     logger.info(
         f"Successfully logged in user with email: {user.email[:5]}... "
         "Returning token to client."
@@ -80,7 +80,7 @@ async def login_user(
 async def update_user(
     request: Request,
     user: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(get_token),
     user_id: int = None,
 ):
@@ -88,7 +88,7 @@ async def update_user(
     logger.info(
         f"Updating user information for user ID: {str(user_id)[:10]}..."
     )
-    DatabaseOperations(db).update_user(user_id, user)
+    await DatabaseOperations(db).update_user(user_id, user)
     logger.info(
         f"Successfully updated user information for user ID: {str(user_id)[:10]}..."
     )
@@ -100,13 +100,13 @@ async def update_user(
 @rate_limit(authenticated_limit=6, unauthenticated_limit=6)
 async def logout_user(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(get_token),
     user_id: int = None,
 ) -> Dict[str, str]:
     """Logout a user"""
     logger.info(f"Logging out user ID: {str(user_id)[:10]}...")
-    DatabaseOperations(db).logout_user(user_id)
+    await DatabaseOperations(db).logout_user(user_id)
     return {"message": "User logged out successfully"}
 
 
@@ -115,13 +115,13 @@ async def logout_user(
 @rate_limit(authenticated_limit=1, unauthenticated_limit=1)
 async def soft_delete_user(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(get_token),
     user_id: int = None,
 ) -> Dict[str, str]:
     """Marks a user as inactive in the database"""
     logger.info(f"Deactivating user ID: {str(user_id)[:10]}...")
-    DatabaseOperations(db).deactivate_user(user_id)
+    await DatabaseOperations(db).deactivate_user(user_id)
     return {"message": "User deactivated successfully"}
 
 
@@ -130,13 +130,13 @@ async def soft_delete_user(
 @rate_limit(authenticated_limit=1, unauthenticated_limit=1)
 async def activate_user(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(get_token),
     user_id: int = None,
 ) -> Dict[str, str]:
     """Reactivates a user in the database"""
     logger.info(f"Reactivating user ID: {str(user_id)[:10]}...")
-    DatabaseOperations(db).activate_user(user_id)
+    await DatabaseOperations(db).activate_user(user_id)
     return {"message": "User reactivated successfully"}
 
 
@@ -145,13 +145,13 @@ async def activate_user(
 @rate_limit(authenticated_limit=1, unauthenticated_limit=1)
 async def hard_delete_user(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(get_token),
     user_id: int = None,
 ) -> Dict[str, str]:
     """Deletes the users row in the database"""
     logger.info(f"Deleting user ID: {str(user_id)[:10]}...")
-    DatabaseOperations(db).hard_delete_user(user_id)
+    await DatabaseOperations(db).hard_delete_user(user_id)
     return {"message": "User deleted successfully"}
 
 
@@ -160,13 +160,15 @@ async def hard_delete_user(
 @rate_limit(authenticated_limit=10, unauthenticated_limit=10)
 async def get_user_profile(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(get_token),
     user_id: UUID = None,
 ) -> Dict[str, Any]:
     """Returns the user's profile information"""
     logger.info(f"Getting user profile for user ID: {str(user_id)[:10]}...")
-    user: Dict[str, Any] = DatabaseOperations(db).get_user_profile(user_id)
+    user: Dict[str, Any] = await DatabaseOperations(db).get_user_profile(
+        user_id
+    )
     return user
 
 
@@ -175,11 +177,11 @@ async def get_user_profile(
 async def request_password_reset(
     request: Request,
     user: UserEmail,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Dict[str, str]:
     """Sends out a link for password reset"""
     logger.info(f"Email: '{user.email[:5]}...' requested a password reset")
-    email_token = DatabaseOperations(db).update_email_token(user.email)
+    email_token = await DatabaseOperations(db).update_email_token(user.email)
     EmailServices().send_reset_email(user.email, email_token)
     return {"message": "Password reset email sent successfully"}
 
@@ -189,15 +191,15 @@ async def request_password_reset(
 async def reset_password(
     request: Request,
     data: PasswordReset,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Dict[str, str]:
     """Resets a user's password"""
     logger.info(
         f"Resetting password for email token: {data.email_token[:10]}..."
     )
-    user = DatabaseOperations(db).reset_password(
+    user = await DatabaseOperations(db).reset_password(
         data.email_token, data.new_password
     )
     user_data = UserLogin(email=user.email, password=data.new_password)
-    auth_token = DatabaseOperations(db).login_user(user_data)
+    auth_token = await DatabaseOperations(db).login_user(user_data)
     return {"token": auth_token}
@@ -1,13 +1,30 @@
 # External imports
-from typing import Dict
+from typing import AsyncIterator, Dict, Optional
 from random import randint
-from re import sub
+from re import search, sub
 from difflib import get_close_matches
+import asyncio
+import json
 
 # Internal imports
 from app.api.v1.game.prompt_builder import PromptBuilder
-from app.api.v1.validation.schemas import StoryActionSegment, GameSession
+from app.api.v1.validation.schemas import (
+    FusedScene,
+    GameSession,
+    StoryActionSegment,
+)
 from app.api.logger.loggable import Loggable
+from app.api.v1.storage.image_store import get_image_store
+from app.api.v1.storage.image_variants import schedule_variants
+from app.api.v1.game.dice_cache import dice_threshold_cache
+from app.api.v1.game.trivial_actions import classify_action
+from app.api.v1.game.mood_classifier import (
+    DEFAULT_MOOD,
+    MOOD_TAXONOMY,
+    mood_classifier,
+)
+from app.api.v1.game.story_compressor import compress_story
+from app.settings import settings
 from app.api.v1.game.generative_apis import (
     TextGeneration,
     ImageGeneration,
@@ -26,11 +43,9 @@ class GameContextManager(Loggable):
         self.logger.info("GameContextManager initialized")
 
     async def roll_dice(self, recent_scene: StoryActionSegment) -> Dict:
-        """Calls LLM to determine dice threshold and rolls dice"""
+        """Determines the dice threshold and rolls dice"""
         self.logger.info(f"Rolling dice for action: {recent_scene.action}")
-        prompt = await self.prompt.get_dice_prompt(recent_scene)
-        llm_output = await self.text.api_call(prompt)
-        threshold: int = await self._convert_dice_threshold_to_int(llm_output)
+        threshold = await self.get_dice_threshold(recent_scene)
         roll: int = randint(1, 20)
         success: bool = roll >= threshold
         dice_results = {
@@ -40,6 +55,31 @@ class GameContextManager(Loggable):
         }
         return dice_results
 
+    async def get_dice_threshold(
+        self, recent_scene: StoryActionSegment
+    ) -> int:
+        """
+        Answers trivial actions locally, then looks the threshold up in the
+        dice threshold cache, and only calls the LLM on a miss.
+        Unparseable LLM output is not cached.
+        """
+        story, action = recent_scene.story, recent_scene.action
+        if settings.DICE_TRIVIAL_FAST_PATH:
+            threshold = classify_action(story, action)
+            if threshold is not None:
+                self.logger.debug("Trivial action, skipping the dice LLM")
+                return threshold
+        threshold = dice_threshold_cache.get(story, action)
+        if threshold is not None:
+            self.logger.debug(f"Dice threshold cache hit: {threshold}")
+            return threshold
+        prompt = await self.prompt.get_dice_prompt(recent_scene)
+        llm_output = await self.text.api_call(prompt)
+        threshold = await self._convert_dice_threshold_to_int(llm_output)
+        if search(r"[0-9]", str(llm_output)):
+            dice_threshold_cache.set(story, action, threshold)
+        return threshold
+
     async def _convert_dice_threshold_to_int(self, llm_output: str) -> int:
         """Converts LLM output for dice threshold to integer"""
         self.logger.debug(f"Converting LLM output to integer: '{llm_output}'")
@@ -58,22 +98,111 @@ class GameContextManager(Loggable):
         self.logger.info(f"New story generated (length: {len(new_story)})")
         return new_story
 
+    def stream_story(self, game_session: GameSession) -> AsyncIterator[str]:
+        """Like new_story, but yields the story as the LLM writes it"""
+        prompt = self.prompt.get_story_prompt(game_session)
+        return self.text.api_stream(prompt)
+
+    async def new_scene_fused(
+        self, game_session: GameSession
+    ) -> Dict[str, Optional[str]]:
+        """
+        Generates the story, compressed story, image prompt and mood with a
+        single JSON mode LLM call. Fields that are missing or unusable in
+        the answer are filled in by the separate stages, concurrently.
+        image_prompt is left as None so that generate_image builds its own.
+        Without a story the other fields describe nothing, so the story is
+        generated separately and every other field is filled in from it.
+        """
+        prompt = self.prompt.get_fused_scene_prompt(game_session)
+        llm_output = await self.text.api_call(prompt, json_mode=True)
+        scene = self._parse_fused_scene(llm_output)
+        story = scene.story
+        if story is None:
+            self.logger.warning("Fused scene has no story, generating it")
+            story = await self.new_story(game_session)
+            scene = FusedScene(story=story)
+
+        fallbacks = {}
+        compressed_story = scene.compressed_story
+        if compressed_story is None:
+            fallbacks["compressed_story"] = self.compress(story)
+        elif len(compressed_story) > settings.COMPRESSED_STORY_MAX_CHARS:
+            compressed_story = compress_story(compressed_story)
+        music = None
+        if scene.mood is None:
+            fallbacks["music"] = self.analyze_mood(story)
+        else:
+            music = self._validate_mood_prompt(scene.mood)
+        if fallbacks:
+            self.logger.info(
+                f"Fused scene missing {', '.join(fallbacks)}, falling back"
+            )
+        results = dict(
+            zip(fallbacks, await asyncio.gather(*fallbacks.values()))
+        )
+        return {
+            "story": story,
+            "compressed_story": results.get(
+                "compressed_story", compressed_story
+            ),
+            "image_prompt": scene.image_prompt,
+            "music": results.get("music", music),
+        }
+
+    def _parse_fused_scene(self, llm_output: str) -> FusedScene:
+        """
+        Parses the JSON object in llm_output. Anything that is not a
+        non-empty string is dropped, so a bad field never fails the scene.
+        """
+        output = str(llm_output)
+        start, end = output.find("{"), output.rfind("}")
+        try:
+            data = json.loads(output[start : end + 1]) if start != -1 else {}
+        except ValueError:
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+        fields = {
+            name: data[name].strip()
+            for name in FusedScene.model_fields
+            if isinstance(data.get(name), str) and data[name].strip()
+        }
+        if len(fields) < len(FusedScene.model_fields):
+            self.logger.warning(
+                f"Fused scene output incomplete: {output[:100]}..."
+            )
+        return FusedScene(**fields)
+
     async def compress(self, story: str) -> str:
-        """Uses LLM API to shorten the story"""
+        """
+        Shortens the story, with the LLM or with the local extractive
+        compressor depending on STORY_COMPRESSOR
+        """
         self.logger.info(f"Compressing story (original length: {len(story)})")
-        prompt = await self.prompt.get_compress_prompt(story)
-        compressed_story = await self.text.api_call(prompt)
+        if settings.STORY_COMPRESSOR == "local":
+            compressed_story = compress_story(story)
+        else:
+            prompt = await self.prompt.get_compress_prompt(story)
+            compressed_story = await self.text.api_call(prompt)
         self.logger.info(
             f"Story compressed (new length: {len(compressed_story)})"
         )
 
         return compressed_story
 
-    async def generate_image(self, story: str) -> str:
-        """Builds prompt and returns image"""
+    async def generate_image(
+        self, story: str, prompt_for_sd: Optional[str] = None
+    ) -> Dict[str, str]:
+        """
+        Builds prompt, generates the image and adds it to the image store.
+        Returns the base64 image and its image_id. The LLM call for the
+        prompt is skipped when prompt_for_sd is given.
+        """
         self.logger.info("Generating image for story")
-        prompt_for_llm = await self.prompt.get_img_prompt(story)
-        prompt_for_sd = await self.text.api_call(prompt_for_llm)
+        if prompt_for_sd is None:
+            prompt_for_llm = await self.prompt.get_img_prompt(story)
+            prompt_for_sd = await self.text.api_call(prompt_for_llm)
         self.logger.debug(
             f"Stable diffusion prompt(non-spicy) received: {prompt_for_sd}"
         )
@@ -85,12 +214,27 @@ class GameContextManager(Loggable):
         self.logger.debug("Sending request to image generation API")
         image: str = await self.image.api_call(spicy_prompt)
         self.logger.info("Image successfully generated")
+        image_id = await get_image_store().put_base64_async(image)
+        schedule_variants(image_id)
 
-        return image
+        return {"image": image, "image_id": image_id}
 
     async def analyze_mood(self, story: str) -> str:
-        """Analyzes the mood of the story and returns path to appropriate music"""
+        """
+        Analyzes the mood of the story and returns path to appropriate music.
+        The local mood classifier is tried first. The LLM is only asked when
+        MOOD_CLASSIFIER is "llm", or when the classifier finds no clear mood
+        and MOOD_LLM_FALLBACK is set.
+        """
         self.logger.info("Analyzing mood of story for music selection")
+        if settings.MOOD_CLASSIFIER != "llm":
+            mood = mood_classifier.classify(story)
+            if mood is not None:
+                self.logger.info(f"Mood classified locally: {mood}")
+                return mood
+            if not settings.MOOD_LLM_FALLBACK:
+                self.logger.info(f"No clear mood, using {DEFAULT_MOOD}")
+                return DEFAULT_MOOD
         prompt = await self.prompt.get_mood_prompt(story)
         llm_output = await self.text.api_call(prompt)
         self.logger.debug(f"Mood analysis LLM output: {llm_output}")
@@ -101,24 +245,13 @@ class GameContextManager(Loggable):
     def _validate_mood_prompt(self, prompt: str) -> str:
         """Validates the mood prompt"""
         self.logger.debug(f"Validating mood prompt: {prompt[:100]}...")
-        valid_combinations = {
-            "calm": ["adventerous", "dreamy", "mystical", "serene"],
-            "medium": [
-                "lurking",
-                "nervous",
-                "ominous",
-                "playful",
-                "quirky",
-                "upbeat",
-            ],
-            "intense": ["chaotic", "combat", "epic", "scary"],
-        }
+        valid_combinations = MOOD_TAXONOMY
         try:
             parts = prompt.split("/")
             if len(parts) == 2:
                 first, second = parts
             else:
-                return "calm/adventerous"
+                return DEFAULT_MOOD
             first = first.lower()
             second = second.lower()
             first_results = get_close_matches(
@@ -142,4 +275,4 @@ class GameContextManager(Loggable):
             return validated_mood
         except Exception as e:
             self.logger.error(f"Error validating mood prompt: {str(e)}")
-            return "calm/adventerous"
+            return DEFAULT_MOOD
@@ -0,0 +1,138 @@
+"""
+Process-wide cache of dice thresholds.
+
+Deciding how hard an action is costs a full LLM round trip, yet the same
+actions ("I open the door", "I talk to the guard") come up again and again,
+often against the same scene since every player starts from the same
+starting stories. Thresholds are cached under a fingerprint of the
+normalized story and action, so wording noise (case, punctuation,
+articles, "I try to") does not cause a miss. Only the threshold is cached;
+the roll itself stays random.
+
+Only the last DICE_CACHE_STORY_CHARS of the story are part of the
+fingerprint. The end of a scene is what the action responds to, and
+ignoring the rest lets scenes with the same ending share thresholds.
+"""
+
+# External imports
+from collections import OrderedDict
+from typing import Dict, Optional
+import hashlib
+import re
+
+# Internal imports
+from app.settings import settings
+from app.api.logger.loggable import Loggable
+
+_WORDS = re.compile(r"[a-z0-9]+")
+
+# Words that do not change how hard an action is
+_FILLER_WORDS = frozenset(
+    {
+        "a",
+        "an",
+        "the",
+        "i",
+        "im",
+        "me",
+        "my",
+        "myself",
+        "we",
+        "our",
+        "you",
+        "your",
+        "to",
+        "then",
+        "just",
+        "now",
+        "please",
+        "try",
+        "tries",
+        "attempt",
+        "attempts",
+        "want",
+        "will",
+        "would",
+        "ll",
+    }
+)
+
+
+def normalize_text(text: str, drop_filler: bool = False) -> str:
+    """Lowercases text and keeps only its words, separated by spaces"""
+    words = _WORDS.findall(text.lower().replace("'", ""))
+    if drop_filler:
+        words = [word for word in words if word not in _FILLER_WORDS]
+    return " ".join(words)
+
+
+def fingerprint(story: str, action: str, story_chars: int = None) -> str:
+    """Key of a story/action pair after normalization"""
+    if story_chars is None:
+        story_chars = settings.DICE_CACHE_STORY_CHARS
+    story_key = normalize_text(story)
+    if story_chars > 0:
+        story_key = story_key[-story_chars:]
+    action_key = normalize_text(action, drop_filler=True)
+    return hashlib.blake2b(
+        f"{story_key}\x1f{action_key}".encode("utf-8"), digest_size=16
+    ).hexdigest()
+
+
+class DiceThresholdCache(Loggable):
+    """Bounded LRU cache of thresholds, with hit-rate counters"""
+
+    def __init__(self, max_size: int = None, log_every: int = 100):
+        super().__init__()
+        self.max_size = (
+            max_size if max_size is not None else settings.DICE_CACHE_MAX_SIZE
+        )
+        self.log_every = log_every
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, story: str, action: str) -> Optional[int]:
+        """Returns the cached threshold, or None on a miss"""
+        if self.max_size <= 0:
+            return None
+        key = fingerprint(story, action)
+        threshold = self._entries.get(key)
+        if threshold is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        if (self.hits + self.misses) % self.log_every == 0:
+            self.logger.info(f"Dice threshold cache: {self.stats()}")
+        return threshold
+
+    def set(self, story: str, action: str, threshold: int):
+        if self.max_size <= 0:
+            return
+        key = fingerprint(story, action)
+        self._entries[key] = threshold
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+dice_threshold_cache = DiceThresholdCache()
@@ -0,0 +1,160 @@
+# External imports
+from typing import Optional
+import asyncio
+import json
+import time
+import boto3
+
+# Internal imports
+from app.settings import settings
+from app.api.logger.loggable import Loggable
+
+"""
+Process-wide tracking of whether the Stable Diffusion EC2 instance is up.
+
+Starting (or confirming) the instance goes through a lambda, which costs a
+synchronous round trip per call. EC2WarmState remembers a successful start
+for EC2_WARM_TTL_SECONDS so only a cold instance pays that cost, and
+concurrent image requests share a single start-up attempt.
+
+A background probe re-confirms the instance while players are active so the
+cached status rarely expires in the middle of a session.
+"""
+
+
+class EC2WarmState(Loggable):
+    """Tracks the warm-state of the Stable Diffusion EC2 instance"""
+
+    def __init__(self, ec2_id: str = None) -> None:
+        super().__init__()
+        self.ec2_id = ec2_id or settings.SD_EC2_ID
+        self._lambda_client = None
+        self._warm_until: float = 0.0
+        self._last_used: float = 0.0
+        self._startup: Optional[asyncio.Task] = None
+        self._keep_warm_task: Optional[asyncio.Task] = None
+
+    @property
+    def lambda_client(self):
+        """The boto3 lambda client, built once and reused for every invoke"""
+        if self._lambda_client is None:
+            self._lambda_client = boto3.client(
+                "lambda", region_name=settings.REGION
+            )
+        return self._lambda_client
+
+    def is_warm(self) -> bool:
+        """True if the instance was confirmed running within the TTL"""
+        return time.monotonic() < self._warm_until
+
+    def mark_warm(self):
+        self._warm_until = time.monotonic() + settings.EC2_WARM_TTL_SECONDS
+
+    def mark_cold(self):
+        """Forgets the cached status, e.g. when the SD endpoint is unreachable"""
+        self._warm_until = 0.0
+
+    async def ensure_running(self, max_attempts: int = 15) -> bool:
+        """
+        Makes sure the EC2 instance is running.
+
+        Returns immediately if the instance is known to be warm. Otherwise
+        every caller awaits the same start-up attempt.
+
+        Returns:
+        bool: True if the EC2 instance is running, False if we never got a 200 response.
+        """
+        self._last_used = time.monotonic()
+        if self.is_warm():
+            return True
+        if self._startup is None or self._startup.done():
+            self.logger.info("EC2 instance not known to be warm, starting it")
+            self._startup = asyncio.create_task(self._start(max_attempts))
+        # Shielded so a cancelled request does not abort the shared start-up
+        return await asyncio.shield(self._startup)
+
+    async def _start(self, max_attempts: int) -> bool:
+        """Calls the start lambda with exponential backoff until it reports 200"""
+        attempt = 0
+        wait_time = 1
+
+        while attempt < max_attempts:
+            try:
+                status_code = await asyncio.to_thread(
+                    self._invoke_start_lambda
+                )
+            except Exception as e:
+                self.logger.error(f"Error invoking start lambda: {str(e)}")
+                status_code = None
+            if status_code == 200:
+                self.mark_warm()
+                self.logger.info(
+                    f"EC2 instance running after {attempt + 1} attempt(s)"
+                )
+                return True
+            attempt += 1
+            if attempt < max_attempts:
+                await asyncio.sleep(wait_time)
+                wait_time = min(wait_time * 2, 30)
+
+        self.mark_cold()
+        return False
+
+    def _invoke_start_lambda(self) -> Optional[int]:
+        """Blocking lambda invoke. Always run through asyncio.to_thread."""
+        response = self.lambda_client.invoke(
+            FunctionName=settings.START_LAMBDA_NAME,
+            InvocationType="RequestResponse",
+            Payload=json.dumps({"instance_id": self.ec2_id}),
+        )
+        lambda_response = json.loads(response["Payload"].read().decode())
+        return lambda_response.get("statusCode")
+
+    def start_keep_warm(self):
+        """Starts the background probe. Called from the application lifespan."""
+        interval = settings.EC2_KEEP_WARM_INTERVAL_SECONDS
+        if interval <= 0 or self._keep_warm_task is not None:
+            return
+        self._keep_warm_task = asyncio.create_task(self._keep_warm(interval))
+        self.logger.info(f"EC2 keep-warm probe started ({interval}s)")
+
+    async def stop_keep_warm(self):
+        if self._keep_warm_task is None:
+            return
+        self._keep_warm_task.cancel()
+        try:
+            await self._keep_warm_task
+        except asyncio.CancelledError:
+            pass
+        self._keep_warm_task = None
+
+    async def _keep_warm(self, interval: float):
+        """
+        Re-confirms the instance while it has been used recently.
+
+        Idle periods are skipped so the probe never keeps the GPU instance
+        alive on its own.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            idle = time.monotonic() - self._last_used
+            if idle > settings.EC2_KEEP_WARM_IDLE_SECONDS:
+                continue
+            try:
+                status_code = await asyncio.to_thread(
+                    self._invoke_start_lambda
+                )
+            except Exception as e:
+                self.logger.warning(f"EC2 keep-warm probe failed: {str(e)}")
+                self.mark_cold()
+                continue
+            if status_code == 200:
+                self.mark_warm()
+            else:
+                self.logger.warning(
+                    f"EC2 keep-warm probe got status code {status_code}"
+                )
+                self.mark_cold()
+
+
+ec2_warm_state = EC2WarmState()
@@ -1,16 +1,22 @@
 # External imports
-from typing import Dict
+from typing import Any, AsyncIterator, Awaitable, Dict, Tuple
+import asyncio
+import time
 
 # Internal imports
 from app.api.v1.game.context_manager import GameContextManager
 from app.api.v1.validation.schemas import StoryActionSegment, GameSession
 from app.api.logger.loggable import Loggable
+from app.api.v1.storage.image_store import image_url
+from app.api.v1.game.turn_sessions import with_action
+from app.settings import settings
 
 
 class SceneGenerator(Loggable):
     def __init__(self, db=None):
         super().__init__()
         self.manager = GameContextManager()
+        self.stage_timings: Dict[str, float] = {}
         self.logger.info("SceneGenerator initialized")
 
     async def get_dice_info(self, story: StoryActionSegment):
@@ -20,21 +26,229 @@ class SceneGenerator(Loggable):
 
     async def get_next_scene(self, game_session: GameSession):
         """
-        Takes context as input and sends new context as output
+        Takes context as input and sends new context as output.
+
+        The story is generated first since every other stage depends on it.
+        Compression, image generation and mood analysis only need the
+        story, so they are fanned out and run concurrently. In the "fused"
+        SCENE_GENERATION_MODE one LLM call returns the story together with
+        its compression, image prompt and mood, and only the image is left.
         """
         self.logger.info(
             f"Generating the {len(game_session.scenes) + 1}th scene."
         )
-        story: str = await self.manager.new_story(game_session)
-        compressed_story: str = await self.manager.compress(story)
-        image: str = await self.manager.generate_image(story)
-        music_path: str = await self.manager.analyze_mood(story)
+        pipeline_start = time.perf_counter()
+        self.stage_timings = {}
+        if settings.SCENE_GENERATION_MODE == "fused":
+            scene = await self._timed_stage(
+                "story", self.manager.new_scene_fused(game_session)
+            )
+            story: str = scene["story"]
+            results = await self._run_concurrent_stages(
+                {
+                    "image": self.manager.generate_image(
+                        story, scene["image_prompt"]
+                    )
+                }
+            )
+            results["compressed_story"] = scene["compressed_story"]
+            results["music"] = scene["music"]
+        else:
+            story: str = await self._timed_stage(
+                "story", self.manager.new_story(game_session)
+            )
+            results = await self._run_concurrent_stages(
+                {
+                    "compressed_story": self.manager.compress(story),
+                    "image": self.manager.generate_image(story),
+                    "music": self.manager.analyze_mood(story),
+                }
+            )
+        self.stage_timings["total"] = time.perf_counter() - pipeline_start
+        self._log_stage_timings()
         return {
             "story": story,
-            "compressed_story": compressed_story,
-            "image": image,
-            "music": music_path,
+            "compressed_story": results["compressed_story"],
+            **self._image_fields(results["image"]),
+            "music": results["music"],
+        }
+
+    async def stream_next_scene(
+        self, game_session: GameSession
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Generates the next scene like get_next_scene, but yields
+        (event, data) pairs as the scene comes together:
+
+        - "story" with each piece of the story as the LLM writes it
+        - "compressed_story", "music" and "image" as each stage finishes,
+          in whatever order they finish
+        - "done" with the whole scene, as get_next_scene returns it, but
+          without the base64 "image": the "image" event already sent it
+
+        If a stage fails, the other stages are cancelled and an "error"
+        event ends the stream. They are also cancelled if the client goes
+        away. The story is always streamed from a separate story call,
+        whatever SCENE_GENERATION_MODE is.
+        """
+        self.logger.info(
+            f"Streaming the {len(game_session.scenes) + 1}th scene."
+        )
+        pipeline_start = time.perf_counter()
+        self.stage_timings = {}
+        tasks: Dict[str, asyncio.Task] = {}
+        try:
+            pieces = []
+            async for piece in self.manager.stream_story(game_session):
+                if not pieces:
+                    self.stage_timings["first_token"] = (
+                        time.perf_counter() - pipeline_start
+                    )
+                pieces.append(piece)
+                yield "story", {"delta": piece}
+            story = "".join(pieces).strip()
+            self.stage_timings["story"] = time.perf_counter() - pipeline_start
+
+            stages = {
+                "compressed_story": self.manager.compress(story),
+                "image": self.manager.generate_image(story),
+                "music": self.manager.analyze_mood(story),
+            }
+            tasks = {
+                name: asyncio.create_task(self._timed_stage(name, coro))
+                for name, coro in stages.items()
+            }
+            names = {task: name for name, task in tasks.items()}
+            scene: Dict[str, Any] = {"story": story}
+            pending = set(tasks.values())
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    name = names[task]
+                    if name == "image":
+                        data = self._image_fields(task.result())
+                    else:
+                        data = {name: task.result()}
+                    scene.update(data)
+                    yield name, data
+        except Exception as e:
+            self.logger.error(f"Streaming scene failed: {str(e)}")
+            yield "error", {"detail": getattr(e, "detail", str(e))}
+            return
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+        self.stage_timings["total"] = time.perf_counter() - pipeline_start
+        self._log_stage_timings()
+        yield "done", {k: v for k, v in scene.items() if k != "image"}
+
+    async def play_turn(
+        self, game_session: GameSession, action: str
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Plays action on the last scene of game_session: rolls the dice and
+        generates the next scene in one go. Returns the dice results and
+        the scene.
+        """
+        dice_info = await self.get_dice_info(
+            StoryActionSegment(
+                story=game_session.scenes[-1]["story"], action=action
+            )
+        )
+        scene = await self.get_next_scene(
+            with_action(game_session, action, dice_info["dice_success"])
+        )
+        return dice_info, scene
+
+    async def stream_turn(
+        self, game_session: GameSession, action: str
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Like play_turn, but yields a "dice" event with the dice results
+        followed by the events of stream_next_scene
+        """
+        try:
+            dice_info = await self.get_dice_info(
+                StoryActionSegment(
+                    story=game_session.scenes[-1]["story"], action=action
+                )
+            )
+        except Exception as e:
+            self.logger.error(f"Dice roll failed: {str(e)}")
+            yield "error", {"detail": getattr(e, "detail", str(e))}
+            return
+        yield "dice", dice_info
+        async for event in self.stream_next_scene(
+            with_action(game_session, action, dice_info["dice_success"])
+        ):
+            yield event
+
+    def _image_fields(self, image: Dict[str, str]) -> Dict[str, Any]:
+        """Scene fields for a generated image"""
+        image_id = image["image_id"]
+        return {
+            "image": image["image"] if settings.SCENE_INLINE_IMAGE else None,
+            "image_id": image_id,
+            "image_url": image_url(image_id, "full"),
+            "thumbnail_url": image_url(image_id, "thumb"),
+        }
+
+    async def _timed_stage(self, name: str, coro: Awaitable[Any]) -> Any:
+        """Awaits a single pipeline stage and records how long it took"""
+        start = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self.stage_timings[name] = time.perf_counter() - start
+
+    async def _run_concurrent_stages(
+        self, stages: Dict[str, Awaitable[Any]]
+    ) -> Dict[str, Any]:
+        """
+        Runs independent stages concurrently and returns their results by name.
+
+        If one stage fails, the remaining stages are cancelled and awaited
+        before the original exception is re-raised, so no request keeps
+        spending LLM or GPU time on a scene that will never be returned.
+        """
+        tasks = {
+            name: asyncio.create_task(self._timed_stage(name, coro))
+            for name, coro in stages.items()
         }
+        try:
+            done, pending = await asyncio.wait(
+                tasks.values(), return_when=asyncio.FIRST_EXCEPTION
+            )
+        except asyncio.CancelledError:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        failed = [task for task in done if task.exception() is not None]
+        if failed:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            failed_names = [
+                name for name, task in tasks.items() if task in failed
+            ]
+            self.logger.error(
+                f"Scene stage(s) {', '.join(failed_names)} failed, "
+                f"cancelled {len(pending)} sibling stage(s)"
+            )
+            raise failed[0].exception()
+        return {name: task.result() for name, task in tasks.items()}
+
+    def _log_stage_timings(self):
+        """Logs the duration of every stage in the last generated scene"""
+        timings = ", ".join(
+            f"{name}={seconds * 1000:.0f}ms"
+            for name, seconds in self.stage_timings.items()
+        )
+        self.logger.info(f"Scene pipeline timings: {timings}")
 
     async def save_game(self, game_session: Dict):
         """Saves the game to the database"""
@@ -1,15 +1,16 @@
 # External imports
-from requests import post, get
-from openai import OpenAI
+from typing import AsyncIterator, Dict, List, Optional, Union
+from requests import post
+from openai import AsyncOpenAI
 from fastapi import HTTPException
-from urllib3.exceptions import NewConnectionError
-from requests.exceptions import ConnectionError
-import boto3
 import json
 import asyncio
+import httpx
 
 # Internal imports
 from app.api.v1.game.instructions import instructions
+from app.api.v1.game.prompt_builder import Prompt
+from app.api.v1.game.ec2_warm_state import ec2_warm_state
 from app.settings import settings
 from app.api.logger.loggable import Loggable
 
@@ -24,6 +25,132 @@ We have three classes corresponding to the three API's:
 - SoundGeneration, ??
 """
 
+# One pooled client per process. Every TextGeneration instance shares it so
+# keep-alive connections are reused across requests instead of being rebuilt
+# for every scene.
+_openai_client: Optional[AsyncOpenAI] = None
+_openai_semaphore: Optional[asyncio.Semaphore] = None
+_sd_client: Optional[httpx.AsyncClient] = None
+_sd_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """Returns the process-wide async OpenAI client, creating it on first use"""
+    global _openai_client
+    if _openai_client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(
+                settings.OPENAI_TIMEOUT_SECONDS,
+                connect=settings.OPENAI_CONNECT_TIMEOUT_SECONDS,
+            ),
+        )
+        _openai_client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=http_client,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+        )
+    return _openai_client
+
+
+def get_openai_semaphore() -> asyncio.Semaphore:
+    """Caps how many completions a single worker keeps in flight"""
+    global _openai_semaphore
+    if _openai_semaphore is None:
+        _openai_semaphore = asyncio.Semaphore(settings.OPENAI_MAX_CONCURRENCY)
+    return _openai_semaphore
+
+
+def get_sd_client() -> httpx.AsyncClient:
+    """Returns the process-wide keep-alive client for the Stable Diffusion API"""
+    global _sd_client
+    if _sd_client is None:
+        _sd_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.SD_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SD_MAX_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(
+                settings.SD_TIMEOUT_SECONDS,
+                connect=settings.SD_CONNECT_TIMEOUT_SECONDS,
+            ),
+        )
+    return _sd_client
+
+
+def get_sd_semaphore() -> asyncio.Semaphore:
+    """Caps how many diffusion requests a single worker sends at once"""
+    global _sd_semaphore
+    if _sd_semaphore is None:
+        _sd_semaphore = asyncio.Semaphore(settings.SD_MAX_CONCURRENCY)
+    return _sd_semaphore
+
+
+async def close_http_clients():
+    """Closes the shared clients. Called when the application shuts down."""
+    global _openai_client, _sd_client
+    if _openai_client is not None:
+        await _openai_client.close()
+        _openai_client = None
+    if _sd_client is not None:
+        await _sd_client.aclose()
+        _sd_client = None
+
+
+class PromptCacheStats(Loggable):
+    """
+    Running totals of prompt tokens and how many of them the provider served
+    from its prompt cache (usage.prompt_tokens_details.cached_tokens).
+
+    NOTE: With the default OPENAI_TEXT_MODEL, gpt-3.5-turbo, the ratio stays
+    at 0: that model does not report cached_tokens, and OpenAI only caches
+    prompt prefixes of 1024 tokens or more, which the instruction blocks are
+    shorter than. The numbers mean something once OPENAI_TEXT_MODEL is set
+    to a model with prompt caching and the shared prefix is long enough.
+    """
+
+    def __init__(self, log_every: int = 100):
+        super().__init__()
+        self.log_every = log_every
+        self.clear()
+
+    def record(self, usage) -> None:
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) or 0
+        self.calls += 1
+        self.prompt_tokens += usage.prompt_tokens or 0
+        self.cached_tokens += cached
+        self.logger.debug(
+            f"Prompt tokens: {usage.prompt_tokens}, cached: {cached}"
+        )
+        if self.calls % self.log_every == 0:
+            self.logger.info(f"Prompt cache: {self.stats()}")
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cached_ratio": (
+                round(self.cached_tokens / self.prompt_tokens, 3)
+                if self.prompt_tokens
+                else 0.0
+            ),
+        }
+
+    def clear(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+
+prompt_cache_stats = PromptCacheStats()
+
 
 class TextGeneration(Loggable):
     """Everything LLM-related"""
@@ -33,21 +160,37 @@ class TextGeneration(Loggable):
         self.instructions = instructions
         self.logger.info("TextGeneration initialized")
         self.endpoint = settings.MISTRAL_ENDPOINT
-        self.openai = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.openai = get_openai_client()
 
-    async def api_call(self, prompt: str, max_tokens: int = 1000):
-        """Using OpenAI because computer slow"""
+    async def api_call(
+        self,
+        prompt: Union[Prompt, str],
+        max_tokens: int = 1000,
+        json_mode: bool = False,
+    ):
+        """
+        Using OpenAI because computer slow. A Prompt is sent as a system
+        message followed by a user message, so the static system block is
+        a cacheable prefix. With json_mode the model is constrained to
+        answer with a single JSON object.
+        """
         self.logger.info(
             f"Making OpenAI API call with max_tokens={max_tokens}"
         )
-        self.logger.debug(f"Prompt length: {len(prompt)}")
+        messages = self._messages(prompt)
+        extra = (
+            {"response_format": {"type": "json_object"}} if json_mode else {}
+        )
         try:
-            response = self.openai.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=max_tokens,
-            )
+            async with get_openai_semaphore():
+                response = await self.openai.chat.completions.create(
+                    model=settings.OPENAI_TEXT_MODEL,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=max_tokens,
+                    **extra,
+                )
+            prompt_cache_stats.record(response.usage)
             result = response.choices[0].message.content
             self.logger.info(
                 f"OpenAI API call successful, received {len(result)} characters"
@@ -60,6 +203,58 @@ class TextGeneration(Loggable):
                 detail=f"Error in OpenAI API call: {str(e)}",
             )
 
+    async def api_stream(
+        self, prompt: Union[Prompt, str], max_tokens: int = 1000
+    ) -> AsyncIterator[str]:
+        """
+        Like api_call, but yields the answer in pieces as the model writes
+        it. The OpenAI semaphore is held until the stream is finished.
+        """
+        self.logger.info(
+            f"Making streaming OpenAI API call with max_tokens={max_tokens}"
+        )
+        messages = self._messages(prompt)
+        received = 0
+        try:
+            async with get_openai_semaphore():
+                stream = await self.openai.chat.completions.create(
+                    model=settings.OPENAI_TEXT_MODEL,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                async for chunk in stream:
+                    # The last chunk has no choices, only the usage
+                    if chunk.usage is not None:
+                        prompt_cache_stats.record(chunk.usage)
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        received += len(chunk.choices[0].delta.content)
+                        yield chunk.choices[0].delta.content
+            self.logger.info(
+                f"OpenAI stream finished, received {received} characters"
+            )
+        except Exception as e:
+            self.logger.error(f"Error in OpenAI API stream: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error in OpenAI API call: {str(e)}",
+            )
+
+    def _messages(self, prompt: Union[Prompt, str]) -> List[Dict[str, str]]:
+        if isinstance(prompt, Prompt):
+            messages = [
+                {"role": "system", "content": prompt.system},
+                {"role": "user", "content": prompt.user},
+            ]
+        else:
+            messages = [{"role": "user", "content": prompt}]
+        self.logger.debug(
+            f"Prompt length: {sum(len(m['content']) for m in messages)}"
+        )
+        return messages
+
     async def _mistral_call_old(self, prompt: str, max_tokens: int = 100):
         """THIS IS MISTRAL"""
         self.logger.info(
@@ -127,24 +322,18 @@ class ImageGeneration(Loggable):
         }
         url = settings.SD_ENDPOINT
         try:
-            response = get(url, params=params)
-            if response.status_code == 200:
-                byte64_image = response.json()["image"]
-                image_size = len(byte64_image) / 1000
-                self.logger.info(
-                    f"Image generation successful, received {image_size} KB"
-                )
-                return byte64_image
-            else:
-                self.logger.error(
-                    f"Stable Diffusion API error: status code {response.status_code}"
-                )
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Error: Stable Diffusion API gave status code: {response.status_code}",
-                )
-        except (NewConnectionError, ConnectionError):
+            async with get_sd_semaphore():
+                byte64_image = await self._fetch_image(url, params)
+            image_size = len(byte64_image) / 1000
+            self.logger.info(
+                f"Image generation successful, received {image_size} KB"
+            )
+            return byte64_image
+        except HTTPException:
+            raise
+        except httpx.ConnectError:
             self.logger.error("Stable Diffusion API is not running")
+            ec2_warm_state.mark_cold()
             raise HTTPException(
                 status_code=500,
                 detail="Stable Diffusion server is not running",
@@ -156,35 +345,47 @@ class ImageGeneration(Loggable):
                 detail=f"Error generating image: {e}",
             )
 
-    async def _start_ec2(self, ec2_id: str, max_attempts=15):
+    async def _fetch_image(self, url: str, params: dict) -> str:
         """
-        Calls the lambda function that starts the EC2 instance.
+        Streams the Stable Diffusion response into a single buffer.
+
+        The body is a JSON object holding a multi-MB base64 string, so it is
+        read chunk by chunk into one bytearray and decoded once instead of
+        being copied between intermediate string buffers.
 
         Returns:
-        bool: True if the EC2 instance is running, False if we never got a 200 response.
+        byte64_image(str): The image in base64 format
         """
-        lambda_client = boto3.client("lambda", region_name=settings.REGION)
-        payload = {"instance_id": ec2_id}
+        async with get_sd_client().stream(
+            "GET", url, params=params
+        ) as response:
+            if response.status_code != 200:
+                self.logger.error(
+                    f"Stable Diffusion API error: status code {response.status_code}"
+                )
+                raise HTTPException(
+                    status_code=response.status_code,
+                    detail=f"Error: Stable Diffusion API gave status code: {response.status_code}",
+                )
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+        return json.loads(body)["image"]
 
-        attempt = 0
-        wait_time = 1
+    async def _start_ec2(self, ec2_id: str, max_attempts=15):
+        """
+        Makes sure the EC2 instance is running.
+        The warm-state is cached process-wide, so only a cold instance
+        pays for the start lambda. See ec2_warm_state.py.
 
-        while attempt < max_attempts:
-            response = lambda_client.invoke(
-                FunctionName=settings.START_LAMBDA_NAME,
-                InvocationType="RequestResponse",
-                Payload=json.dumps(payload),
+        Returns:
+        bool: True if the EC2 instance is running, False if we never got a 200 response.
+        """
+        if ec2_id != ec2_warm_state.ec2_id:
+            self.logger.warning(
+                f"Requested EC2 {ec2_id} is not the tracked instance"
             )
-            lambda_response = json.loads(response["Payload"].read().decode())
-            status_code = lambda_response.get("statusCode")
-            if status_code == 200:
-                return True
-            attempt += 1
-            if attempt < max_attempts:
-                await asyncio.sleep(wait_time)
-                wait_time = min(wait_time * 2, 30)
-
-        return False
+        return await ec2_warm_state.ensure_running(max_attempts=max_attempts)
 
 
 class SoundGeneration(Loggable):
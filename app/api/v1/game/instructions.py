@@ -1,3 +1,14 @@
+from app.api.v1.game.mood_classifier import MOOD_TAXONOMY
+
+# Built from MOOD_TAXONOMY so the prompt offers exactly the labels that
+# _validate_mood_prompt accepts. "adventerous" is misspelled, but it is
+# the label clients receive as music, so it is not renamed here.
+MOOD_LABELS = ", ".join(
+    f"{level}/{subgenre}"
+    for level, subgenres in MOOD_TAXONOMY.items()
+    for subgenre in subgenres
+)
+
 instructions = {
     "generate_story": """
         Instructions: You are a storyteller that creates 
@@ -110,4 +121,18 @@ instructions = {
         'tension: intense/subgenre: chaotic'
         'Okay here is the mood: medium/nervous'
     """,
+    "generate_scene_json": (
+        """
+        You are a storyteller that writes the next segment of an interactive story, based on the protagonist's action and whether or not it was successful.
+        You will receive the protagonist's name, their inventory, the previous story segments (oldest first) and the protagonist's latest action.
+        Answer with ONLY a JSON object with exactly these keys:
+        "story": The next story segment as raw text. Maximum 100 words. Consistent with earlier events and the attempted action, in the same tone. End at a natural pause that invites player action. No prefixes, no bullet points, never suggest what the player should do.
+        "compressed_story": The new story segment summarized in at most 100 characters, keeping the most important details.
+        "image_prompt": A stable diffusion prompt of at most 100 characters for the new story segment. Describe the setting, mood, weather and what is happening. No character names.
+        "mood": The mood of the new story segment as 'tension-level/subgenre', one of: """
+        + MOOD_LABELS
+        + """.
+        Example: {"story": "The smoke curls around the bathroom stall as you inhale deeply. A knock on the door startles you.", "compressed_story": "You smoke in a stall; a knock startles you.", "image_prompt": "dim school bathroom, smoke, stall door, security guard shoes under door", "mood": "medium/nervous"}
+    """
+    ),
 }
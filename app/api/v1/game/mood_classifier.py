@@ -0,0 +1,363 @@
+"""
+Local mood classifier for scene music.
+
+analyze_mood used to spend an LLM call to pick one of the fixed
+tension-level/subgenre labels in MOOD_TAXONOMY. MoodClassifier picks the
+label locally with a weighted keyword scorer:
+
+- Every label has a small lexicon of words and word stems.
+- Stems shared by several labels say less about the mood, so each stem is
+  weighted by an inverse label frequency (the IDF part of TF-IDF).
+- A story is scored per label by summing 1 + log(tf) * idf over the stems
+  it contains. The tension level with the highest total wins, then the
+  best subgenre within that level.
+
+If no label reaches MOOD_MIN_SCORE the story carries no clear mood signal.
+classify then returns None and the caller falls back to the LLM when
+MOOD_LLM_FALLBACK is set, or to DEFAULT_MOOD.
+"""
+
+# External imports
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import math
+import re
+
+# Internal imports
+from app.settings import settings
+
+MOOD_TAXONOMY: Dict[str, List[str]] = {
+    "calm": ["adventerous", "dreamy", "mystical", "serene"],
+    "medium": [
+        "lurking",
+        "nervous",
+        "ominous",
+        "playful",
+        "quirky",
+        "upbeat",
+    ],
+    "intense": ["chaotic", "combat", "epic", "scary"],
+}
+
+_WORDS = re.compile(r"[a-z]+")
+MAX_MEMOIZED_WORDS = 50_000
+
+DEFAULT_MOOD = "calm/adventerous"
+
+# Entries ending in "*" match any word starting with them, other entries
+# match the whole word and its plural. Entries can be at most two words.
+MOOD_LEXICON: Dict[str, List[str]] = {
+    "calm/adventerous": [
+        "journey*",
+        "travel*",
+        "road",
+        "path",
+        "explor*",
+        "map",
+        "horizon",
+        "quest*",
+        "set out",
+        "adventur*",
+        "ride",
+        "riding",
+        "sail*",
+        "mountain",
+        "valley",
+        "discover*",
+        "wander*",
+        "village",
+        "market",
+    ],
+    "calm/dreamy": [
+        "dream*",
+        "float*",
+        "cloud",
+        "soft*",
+        "gentl*",
+        "haz*",
+        "drift*",
+        "sleep*",
+        "memor*",
+        "sunset",
+        "star",
+        "glow*",
+        "warm*",
+    ],
+    "calm/mystical": [
+        "magic*",
+        "ancient",
+        "rune",
+        "spirit",
+        "crystal",
+        "prophec*",
+        "arcan*",
+        "enchant*",
+        "artifact",
+        "shimmer*",
+        "temple",
+        "crown",
+        "legend*",
+        "wizard",
+        "elder",
+    ],
+    "calm/serene": [
+        "peace*",
+        "quiet*",
+        "calm*",
+        "still",
+        "meadow",
+        "breeze",
+        "sunlight",
+        "river",
+        "lake",
+        "bird",
+        "rest",
+        "resting",
+        "garden",
+        "tea",
+        "fireplace",
+    ],
+    "medium/lurking": [
+        "shadow*",
+        "watched",
+        "watching",
+        "stalk*",
+        "creep*",
+        "lurk*",
+        "hidden",
+        "followed",
+        "following",
+        "behind you",
+        "movement",
+        "footstep",
+        "crawl*",
+        "slither*",
+    ],
+    "medium/nervous": [
+        "nervous*",
+        "anxious*",
+        "sweat*",
+        "trembl*",
+        "heart pound*",
+        "hesitat*",
+        "uneas*",
+        "worri*",
+        "fidget*",
+        "whisper*",
+        "glanc*",
+        "tense",
+    ],
+    "medium/ominous": [
+        "dark*",
+        "cold",
+        "silence",
+        "storm*",
+        "fog",
+        "mist",
+        "decay*",
+        "abandon*",
+        "ruin*",
+        "omen",
+        "dread*",
+        "grim",
+        "crimson",
+        "drip*",
+        "basement",
+    ],
+    "medium/playful": [
+        "laugh*",
+        "joke",
+        "joking",
+        "grin*",
+        "playful*",
+        "teas*",
+        "wink*",
+        "giggl*",
+        "dance",
+        "dancing",
+        "cheer*",
+    ],
+    "medium/quirky": [
+        "odd",
+        "strange*",
+        "weird*",
+        "peculiar",
+        "curious*",
+        "eccentric",
+        "bizarre",
+        "goblin",
+        "hat",
+    ],
+    "medium/upbeat": [
+        "festiv*",
+        "celebrat*",
+        "music*",
+        "song",
+        "bright*",
+        "happ*",
+        "tavern",
+        "crowd*",
+        "feast*",
+        "friend*",
+    ],
+    "intense/chaotic": [
+        "explo*",
+        "collaps*",
+        "alarm*",
+        "chaos",
+        "chaotic",
+        "scream*",
+        "crash*",
+        "burn*",
+        "shatter*",
+        "panic*",
+        "tore",
+        "venting",
+        "emergenc*",
+        "flood*",
+    ],
+    "intense/combat": [
+        "sword",
+        "blade",
+        "attack*",
+        "fight*",
+        "battl*",
+        "strike",
+        "shoot*",
+        "gun",
+        "rifle",
+        "soldier",
+        "enemy",
+        "enemies",
+        "hostile",
+        "wound*",
+        "blood*",
+        "shield",
+        "arrow",
+        "punch*",
+    ],
+    "intense/epic": [
+        "king",
+        "kingdom",
+        "army",
+        "armies",
+        "dragon",
+        "destiny",
+        "hero",
+        "heroes",
+        "legion",
+        "throne",
+        "war",
+        "fate",
+        "triumph*",
+        "glor*",
+    ],
+    "intense/scary": [
+        "horror*",
+        "terror*",
+        "monster",
+        "creature",
+        "scream*",
+        "blood*",
+        "corpse",
+        "ghost",
+        "demon",
+        "nightmare",
+        "claw",
+        "fang",
+        "flesh",
+        "sinkhole",
+    ],
+}
+
+
+class MoodClassifier:
+    """Scores text against MOOD_LEXICON. Build once, reuse for every call."""
+
+    def __init__(self, lexicon: Dict[str, List[str]] = None):
+        lexicon = lexicon or MOOD_LEXICON
+        labels_per_stem = Counter(
+            stem for stems in lexicon.values() for stem in set(stems)
+        )
+        self.idf: Dict[str, float] = {
+            stem: math.log(1 + len(lexicon) / count)
+            for stem, count in labels_per_stem.items()
+        }
+        self.labels_by_stem: Dict[str, List[str]] = {}
+        for label, stems in lexicon.items():
+            for stem in set(stems):
+                self.labels_by_stem.setdefault(stem, []).append(label)
+        self.words = {stem for stem in self.idf if not stem.endswith("*")}
+        self.prefixes = {stem[:-1] for stem in self.idf if stem.endswith("*")}
+        self.longest_prefix = max(map(len, self.prefixes), default=0)
+        self.first_words = {
+            stem.split()[0] for stem in self.idf if " " in stem
+        }
+        # Story vocabulary repeats a lot, so matches are memoized per word
+        self._matches: Dict[str, Optional[str]] = {}
+
+    def _match(self, term: str) -> Optional[str]:
+        """The lexicon entry that term matches, if any"""
+        try:
+            return self._matches[term]
+        except KeyError:
+            pass
+        stem = self._find(term)
+        if len(self._matches) < MAX_MEMOIZED_WORDS:
+            self._matches[term] = stem
+        return stem
+
+    def _find(self, term: str) -> Optional[str]:
+        if term in self.words:
+            return term
+        if term.endswith("s") and term[:-1] in self.words:
+            return term[:-1]
+        for length in range(min(len(term), self.longest_prefix), 1, -1):
+            if term[:length] in self.prefixes:
+                return term[:length] + "*"
+        return None
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """TF-IDF style score of text for every label that matched"""
+        words = _WORDS.findall(text.lower().replace("'", ""))
+        term_counts = Counter()
+        for index, word in enumerate(words):
+            stem = self._match(word)
+            if stem is not None:
+                term_counts[stem] += 1
+            if word in self.first_words and index + 1 < len(words):
+                # Entries of two words, such as "set out"
+                stem = self._match(f"{word} {words[index + 1]}")
+                if stem is not None and " " in stem:
+                    term_counts[stem] += 1
+        scores: Dict[str, float] = {}
+        for stem, count in term_counts.items():
+            weight = (1 + math.log(count)) * self.idf[stem]
+            for label in self.labels_by_stem[stem]:
+                scores[label] = scores.get(label, 0.0) + weight
+        return scores
+
+    def classify(self, text: str, min_score: float = None) -> Optional[str]:
+        """
+        Returns the best 'tension-level/subgenre' label for text, or None
+        if no label scores at least min_score.
+        """
+        if min_score is None:
+            min_score = settings.MOOD_MIN_SCORE
+        scores = self.scores(text)
+        if not scores or max(scores.values()) < min_score:
+            return None
+        level_totals: Dict[str, float] = {}
+        for label, score in scores.items():
+            level = label.split("/")[0]
+            level_totals[level] = level_totals.get(level, 0.0) + score
+        level = max(level_totals, key=level_totals.get)
+        best: Tuple[float, str] = max(
+            (score, label)
+            for label, score in scores.items()
+            if label.startswith(f"{level}/")
+        )
+        return best[1]
+
+
+mood_classifier = MoodClassifier()
@@ -1,10 +1,30 @@
 # External imports
-from typing import Dict, List
+from textwrap import dedent
+from typing import Dict, List, NamedTuple
 
 # Internal imports
 from app.api.v1.game.instructions import instructions
+from app.api.v1.game.token_counter import count_tokens
 from app.api.v1.validation.schemas import StoryActionSegment, GameSession
 from app.api.logger.loggable import Loggable
+from app.settings import settings
+
+
+class Prompt(NamedTuple):
+    """
+    A prompt split into a static system block and the dynamic user content.
+    The system block is the same bytes on every call with the same
+    instructions, so providers with prefix caching can reuse it.
+    """
+
+    system: str
+    user: str
+
+
+# Dedented once so that every call sends the exact same system block
+SYSTEM_PROMPTS: Dict[str, str] = {
+    name: dedent(text).strip() for name, text in instructions.items()
+}
 
 
 class PromptBuilder(Loggable):
@@ -12,7 +32,7 @@ class PromptBuilder(Loggable):
 
     def __init__(self):
         super().__init__()
-        self.instructions = instructions
+        self.instructions = SYSTEM_PROMPTS
         self.logger.info("PromptBuilder initialized")
 
     async def get_dice_prompt(self, recent_scene: StoryActionSegment):
@@ -20,71 +40,130 @@ class PromptBuilder(Loggable):
         self.logger.info(
             f"Building dice prompt for action: {recent_scene.action}"
         )
-        instructions = self.instructions["determine_dice_roll"]
         story = recent_scene.story
         action = recent_scene.action
-        prompt = (
-            f"Instructions: {instructions}\n\n"
-            f"Story: {story}\n"
-            f"Action: {action}\n"
+        prompt = Prompt(
+            self.instructions["determine_dice_roll"],
+            f"Story: {story}\nAction: {action}\n",
+        )
+        self.logger.debug(
+            f"Dice prompt built (prompt length: {len(prompt.user)})"
         )
-        self.logger.debug(f"Dice prompt built (prompt length: {len(prompt)})")
         return prompt
 
-    def get_story_prompt(self, game_session: GameSession) -> str:
+    def get_story_prompt(self, game_session: GameSession) -> Prompt:
         """Builds the prompt for new stories"""
         self.logger.info("Building story prompt")
         instructions: str = self.instructions["generate_story"]
+        prompt = self._build_scene_prompt(instructions, game_session)
+        self.logger.debug(
+            f"Story prompt built with length: {len(prompt.user)})"
+        )
+        return prompt
+
+    def get_fused_scene_prompt(self, game_session: GameSession) -> Prompt:
+        """
+        Builds the prompt for a whole scene in one call. The model answers
+        with a JSON object holding the story, compressed story, image prompt
+        and mood.
+        """
+        self.logger.info("Building fused scene prompt")
+        instructions: str = self.instructions["generate_scene_json"]
+        prompt = self._build_scene_prompt(instructions, game_session)
+        self.logger.debug(
+            f"Fused scene prompt built with length: {len(prompt.user)})"
+        )
+        return prompt
+
+    def _build_scene_prompt(
+        self, instructions: str, game_session: GameSession
+    ) -> Prompt:
+        """
+        Fills STORY_PROMPT_TOKEN_BUDGET with the story so far, newest scene
+        first. Scenes are sent in full until one no longer fits, then as
+        their compressed_story, and the rest are left out. The latest scene
+        is always sent in full since the action responds to it.
+        """
         name: str = game_session.protagonist_name
         inv: str = ", ".join(game_session.inventory)
-        recent_scenes: List[Dict] = game_session.scenes[-10:]
-        action: str = recent_scenes[-1]["action"]
-        success: bool = recent_scenes[-1]["dice_success"]
-        prompt = (
-            f"Instructions: {instructions}\n\n"
+        scenes: List[Dict] = game_session.scenes
+        action: str = scenes[-1]["action"]
+        success: bool = scenes[-1]["dice_success"]
+        header = (
             f"Protagonist name: {name}\n"
             f"Protagonist's inventory: {inv}\n\n"
             "The story so far:\n"
         )
-        for i, scene in enumerate(recent_scenes, 1):
-            prompt += f"Story {i}: {scene['story']}\n\n"
-        prompt += f"Protagonist's action based on the last story: {action}\n"
-        prompt += f"Action successful: {success}\n\n"
-        prompt += f"Story {len(recent_scenes) + 1}: Please write this story based on what just happened.\n\n"
-        self.logger.debug(f"Story prompt built with length: {len(prompt)})")
+        turn = (
+            f"Protagonist's action based on the last story: {action}\n"
+            f"Action successful: {success}\n\n"
+        )
+        # The story number is only known once the stories are picked. The
+        # action is user input, so the footer is never run through format.
+        request = "Please write this story based on what just happened.\n\n"
+        budget = (
+            settings.STORY_PROMPT_TOKEN_BUDGET
+            - count_tokens(instructions)
+            - count_tokens(header)
+            - count_tokens(turn)
+            - count_tokens(f"Story {len(scenes) + 1}: {request}")
+        )
+
+        # Counted with the widest story number, which is close enough
+        line = "Story " + str(len(scenes)) + ": {}\n\n"
+        stories: List[str] = []
+        full = True
+        for index, scene in enumerate(reversed(scenes)):
+            story = scene["story"] if full else None
+            tokens = count_tokens(line.format(story)) if full else 0
+            if index > 0 and (not full or tokens > budget):
+                full = False
+                story = scene.get("compressed_story")
+                if not story:
+                    break
+                tokens = count_tokens(line.format(story))
+                if tokens > budget:
+                    break
+            stories.append(story)
+            budget -= tokens
+
+        lines = [
+            f"Story {i}: {story}\n\n"
+            for i, story in enumerate(reversed(stories), 1)
+        ]
+        footer = f"{turn}Story {len(stories) + 1}: {request}"
+        prompt = Prompt(instructions, "".join([header, *lines, footer]))
+        self.logger.debug(
+            f"Scene prompt: {len(stories)} of {len(scenes)} scenes, "
+            f"{settings.STORY_PROMPT_TOKEN_BUDGET - budget} tokens"
+        )
         return prompt
 
-    async def get_compress_prompt(self, story: str):
+    async def get_compress_prompt(self, story: str) -> Prompt:
         """Builds the prompt for compressing a story"""
         self.logger.info(
             f"Building compression prompt for story with length: {len(story)})"
         )
-        instructions = self.instructions["compress_story"]
-        prompt = f"Instructions: {instructions}\n" f"Story: {story}"
+        prompt = Prompt(self.instructions["compress_story"], f"Story: {story}")
         self.logger.debug(
-            f"Compression prompt built with length: {len(prompt)})"
+            f"Compression prompt built with length: {len(prompt.user)})"
         )
         return prompt
 
-    async def get_img_prompt(self, story: str):
+    async def get_img_prompt(self, story: str) -> Prompt:
         """Build the prompt for image generation"""
         self.logger.info(
             f"Building image prompt for story with length: {len(story)})"
         )
-        instructions = self.instructions["image_prompt"]
-        prompt = f"""
-            Instructions: {instructions}
-
-            Story: {story}
-        """
-        self.logger.debug(f"Image prompt built with length: {len(prompt)})")
+        prompt = Prompt(self.instructions["image_prompt"], f"Story: {story}")
+        self.logger.debug(
+            f"Image prompt built with length: {len(prompt.user)})"
+        )
         return prompt
 
-    async def get_mood_prompt(self, story: str):
+    async def get_mood_prompt(self, story: str) -> Prompt:
         """Build the prompt for mood analysis"""
         self.logger.info(
             f"Building mood analysis prompt for story with length: {len(story)})"
         )
-        instructions = self.instructions["analyze_mood"]
-        prompt = f"Instructions: {instructions}\nStory: {story}"
-        return prompt
+        return Prompt(self.instructions["analyze_mood"], f"Story: {story}")
@@ -0,0 +1,217 @@
+"""
+Opt-in speculative generation of the next scene.
+
+A turn is two requests in a row: /roll_dice and then /generate_new_scene
+with the same action and the dice result. Between them the client shows
+the roll, and the backend sits idle. With SPECULATIVE_SCENES set, every
+input of the next scene is known once the dice are rolled:
+1) After each scene, remember() keeps the game session with the new scene
+   appended, per user.
+2) When the dice are rolled on that scene, speculate() adds the action and
+   the result, and starts generating the next scene in the background.
+3) /generate_new_scene calls take(). If the session it was sent matches
+   the speculated one, it returns the speculated scene, or awaits it if it
+   is still being generated. Otherwise the scene is generated as usual.
+
+Entries expire after SPECULATIVE_TTL_SECONDS. The store keeps at most
+SPECULATIVE_MAX_SESSIONS users and SPECULATIVE_MAX_BYTES of generated
+scenes, and evicts the least recently used entries beyond that. Evicted or
+replaced speculations are cancelled so no LLM or GPU time is spent on them.
+
+NOTE: Entries are per worker. A /generate_new_scene that lands on another
+worker than its /roll_dice generates the scene as usual.
+"""
+
+# External imports
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+from uuid import UUID
+import asyncio
+import hashlib
+import json
+import time
+
+# Internal imports
+from app.settings import settings
+from app.api.logger.loggable import Loggable
+from app.api.v1.validation.schemas import GameSession
+from app.api.v1.game.turn_sessions import next_session, with_action
+
+SceneFactory = Callable[[GameSession], Awaitable[Dict[str, Any]]]
+
+
+def session_key(game_session: GameSession) -> str:
+    """
+    Fingerprint of everything the next scene is generated from. Fields the
+    prompt does not use, such as the session name, are left out.
+    """
+    turns = [
+        (scene.get("story"), scene.get("action"), scene.get("dice_success"))
+        for scene in game_session.scenes
+    ]
+    payload = json.dumps(
+        [game_session.protagonist_name, game_session.inventory, turns]
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass
+class _Entry:
+    base: GameSession
+    expires_at: float
+    key: Optional[str] = None
+    task: Optional[asyncio.Task] = None
+    size: int = 0
+
+
+class SpeculativeSceneStore(Loggable):
+    """Per-user speculative scenes, bounded by count, bytes and TTL"""
+
+    def __init__(
+        self,
+        max_sessions: int = None,
+        max_bytes: int = None,
+        ttl: float = None,
+    ):
+        super().__init__()
+        self.max_sessions = max_sessions or settings.SPECULATIVE_MAX_SESSIONS
+        self.max_bytes = max_bytes or settings.SPECULATIVE_MAX_BYTES
+        self.ttl = ttl if ttl is not None else settings.SPECULATIVE_TTL_SECONDS
+        self._entries: "OrderedDict[UUID, _Entry]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def remember(
+        self,
+        user_id: UUID,
+        game_session: GameSession,
+        scene: Dict[str, Any],
+    ):
+        """Keeps game_session with scene appended as the user's next turn"""
+        if not settings.SPECULATIVE_SCENES:
+            return
+        self._remove(user_id)
+        self._entries[user_id] = _Entry(
+            base=next_session(game_session, scene),
+            expires_at=time.monotonic() + self.ttl,
+        )
+        self._enforce_limits()
+
+    def speculate(
+        self,
+        user_id: UUID,
+        story: str,
+        action: str,
+        dice_success: bool,
+        generate: SceneFactory,
+    ):
+        """
+        Starts generating the next scene if the dice were rolled on the
+        last scene remembered for user_id
+        """
+        entry = self._get(user_id)
+        if entry is None or entry.base.scenes[-1]["story"] != story:
+            return
+        if entry.task is not None:
+            # A re-roll on the same scene replaces the earlier speculation
+            self._cancel(entry)
+        game_session = with_action(entry.base, action, dice_success)
+        entry.key = session_key(game_session)
+        entry.task = asyncio.create_task(generate(game_session))
+        entry.task.add_done_callback(lambda task: self._account(user_id, task))
+        entry.expires_at = time.monotonic() + self.ttl
+        self.logger.debug(f"Speculating scene for user {str(user_id)[:5]}...")
+
+    async def take(
+        self, user_id: UUID, game_session: GameSession
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Returns the speculated scene if it was generated from game_session,
+        otherwise None. A scene is only handed out once.
+        """
+        entry = self._get(user_id)
+        if entry is None or entry.task is None:
+            return None
+        if entry.key != session_key(game_session):
+            self.misses += 1
+            self._remove(user_id)
+            return None
+        self._entries.pop(user_id)
+        self.total_bytes -= entry.size
+        try:
+            scene = await entry.task
+        except Exception as e:
+            self.logger.warning(f"Speculated scene failed: {str(e)}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return scene
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "sessions": len(self._entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def clear(self):
+        for user_id in list(self._entries):
+            self._remove(user_id)
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, user_id: UUID) -> Optional[_Entry]:
+        if not settings.SPECULATIVE_SCENES:
+            return None
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(user_id)
+            return None
+        self._entries.move_to_end(user_id)
+        return entry
+
+    def _account(self, user_id: UUID, task: asyncio.Task):
+        """Counts the size of a finished speculation against max_bytes"""
+        if task.cancelled() or task.exception() is not None:
+            return
+        entry = self._entries.get(user_id)
+        if entry is None or entry.task is not task:
+            return
+        entry.size = len(json.dumps(task.result(), default=str))
+        self.total_bytes += entry.size
+        self._enforce_limits()
+
+    def _enforce_limits(self):
+        now = time.monotonic()
+        for user_id in [
+            user_id
+            for user_id, entry in self._entries.items()
+            if entry.expires_at <= now
+        ]:
+            self._remove(user_id)
+        while len(self._entries) > self.max_sessions or (
+            self.total_bytes > self.max_bytes and self._entries
+        ):
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, user_id: UUID):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._cancel(entry)
+
+    def _cancel(self, entry: _Entry):
+        if entry.task is not None and not entry.task.done():
+            entry.task.cancel()
+        self.total_bytes -= entry.size
+        entry.size = 0
+        entry.task = None
+
+
+speculative_scenes = SpeculativeSceneStore()
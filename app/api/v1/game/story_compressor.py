@@ -0,0 +1,112 @@
+"""
+Local extractive compression of stories.
+
+compressed_story is a short summary of each scene that later prompts use
+as context. compress_story picks it out of the story itself, so the LLM
+call is not needed:
+
+1) The story is split into sentences.
+2) Each sentence is scored by how frequent its content words are in the
+   whole story. Words that come up again and again are what the scene is
+   about. The first and last sentences get a small bonus, since they set the
+   scene and hold what just happened. Fragments like '"Help!"' rank last.
+3) The best sentences are taken in story order while they fit the budget.
+   If not even the best sentence fits, it is cut at a word boundary.
+
+The result is deterministic, so the same story always compresses the same.
+Compare it with the LLM path with benchmarks/story_compression.py.
+"""
+
+# External imports
+from collections import Counter
+from typing import List
+import re
+
+# Internal imports
+from app.settings import settings
+
+_SENTENCES = re.compile(r"[^.!?]+(?:[.!?]+[\"')\]]*|$)")
+_WORDS = re.compile(r"[a-z']+")
+_STOPWORDS = frozenset("""
+    a an the and or but if then so of to in on at by for with from into onto
+    up down out over under as is are was were be been being am do does did
+    have has had it its this that these those there here you your yours i me
+    my we our they them their he him his she her not no nor just very can
+    could would should will shall may might must what which who whom whose
+    when where why how all any each every some such than too also only own
+    same again further once about against between through during before
+    after above below off while because until s t
+    """.split())
+POSITION_BONUS = 0.25
+MIN_CONTENT_WORDS = 3
+ELLIPSIS = "…"
+
+
+def split_sentences(story: str) -> List[str]:
+    return [
+        sentence.strip()
+        for sentence in _SENTENCES.findall(story.strip())
+        if sentence.strip()
+    ]
+
+
+def _content_words(text: str) -> List[str]:
+    return [
+        word
+        for word in _WORDS.findall(text.lower())
+        if word not in _STOPWORDS and len(word) > 2
+    ]
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    """Cuts text at the last word boundary that fits max_chars"""
+    if len(text) <= max_chars:
+        return text
+    cut = text[: max_chars - len(ELLIPSIS)]
+    if " " in cut:
+        cut = cut[: cut.rindex(" ")]
+    return cut.rstrip(" ,;:-") + ELLIPSIS
+
+
+def compress_story(story: str, max_chars: int = None) -> str:
+    """Returns an extractive summary of story of at most max_chars"""
+    if max_chars is None:
+        max_chars = settings.COMPRESSED_STORY_MAX_CHARS
+    story = " ".join(story.split())
+    if len(story) <= max_chars:
+        return story
+    sentences = split_sentences(story)
+    if not sentences:
+        return _truncate(story, max_chars)
+
+    frequencies = Counter(_content_words(story))
+    top = max(frequencies.values(), default=1)
+    scores = []
+    for index, sentence in enumerate(sentences):
+        words = _content_words(sentence)
+        score = (
+            sum(frequencies[word] for word in words) / top / len(words)
+            if words
+            else 0.0
+        )
+        if index == 0 or index == len(sentences) - 1:
+            score += POSITION_BONUS
+        if len(words) < MIN_CONTENT_WORDS:
+            score -= 1
+        scores.append(score)
+
+    ranked = sorted(
+        range(len(sentences)), key=lambda index: scores[index], reverse=True
+    )
+    chosen = []
+    length = 0
+    for index in ranked:
+        if chosen and scores[index] < 0:
+            break
+        added = len(sentences[index]) + (1 if chosen else 0)
+        if length + added <= max_chars:
+            chosen.append(index)
+            length += added
+    if not chosen:
+        return _truncate(sentences[ranked[0]], max_chars)
+    return " ".join(sentences[index] for index in sorted(chosen))
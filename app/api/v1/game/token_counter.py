@@ -0,0 +1,56 @@
+"""
+Local token counting for prompt budgets.
+
+Tokens are counted with tiktoken and the encoding of OPENAI_TEXT_MODEL.
+Models tiktoken does not know are counted with cl100k_base. tiktoken
+downloads the encoding on first use; if that fails, for example on a host
+without internet access, count_tokens logs a warning and falls back to an
+estimate of one token per four characters, rounded up. Set
+TIKTOKEN_CACHE_DIR to a directory holding the encoding for offline hosts.
+"""
+
+# External imports
+from functools import lru_cache
+from typing import Callable, Optional
+import math
+import tiktoken
+
+# Internal imports
+from app.settings import settings
+from app.api.logger.logger import get_logger
+
+FALLBACK_ENCODING = "cl100k_base"
+CHARS_PER_TOKEN = 4
+
+logger = get_logger("app.game.token_counter")
+
+
+def _estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@lru_cache(maxsize=1)
+def get_encoder() -> Optional[Callable[[str], list]]:
+    """
+    Loads the encoding once. main calls it at startup, so no request waits
+    for the download.
+    """
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(settings.OPENAI_TEXT_MODEL)
+        except KeyError:
+            encoding = tiktoken.get_encoding(FALLBACK_ENCODING)
+    except Exception as e:
+        logger.warning(
+            f"Could not load tiktoken encoding, estimating token counts: {e}"
+        )
+        return None
+    return encoding.encode_ordinary
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens text takes up in a prompt"""
+    encode = get_encoder()
+    if encode is None:
+        return _estimate_tokens(text)
+    return len(encode(text))
@@ -0,0 +1,273 @@
+"""
+Local fast path for actions that never need a dice roll.
+
+The determine_dice_roll instructions tell the LLM that walking around,
+talking to people and similar actions need no roll, so the LLM answers 0
+for them after a full round trip. classify_action recognises the obvious
+cases with a compiled verb lexicon and answers 0 locally.
+
+The matcher is deliberately conservative. An action is only trivial when:
+- It starts with a trivial verb or phrase (after filler like "I try to").
+- It contains none of the risk words, such as attack, sneak or quickly.
+- It is short, since long actions tend to chain several things together.
+- The end of the story has no danger words, such as chasing or locked.
+Everything else is escalated to the LLM.
+
+Measure changes to the lexicon with benchmarks/trivial_actions.py.
+"""
+
+# External imports
+from typing import Optional
+import re
+
+# Internal imports
+from app.settings import settings
+
+TRIVIAL_THRESHOLD = 0
+
+_LEADING_FILLER = (
+    r"(?:(?:i|we|you)\s+)?(?:(?:just|then|now|slowly|calmly)\s+)?"
+    r"(?:(?:try|want|decide|start|begin)(?:\s+to)?\s+|will\s+|'ll\s+)?"
+)
+
+_TRIVIAL_VERBS = (
+    "walk",
+    "walks",
+    "go",
+    "goes",
+    "head",
+    "heads",
+    "turn around",
+    "turn back",
+    "turns around",
+    "turns back",
+    "return",
+    "returns",
+    "step",
+    "steps",
+    "move",
+    "moves",
+    "continue",
+    "continues",
+    "keep walking",
+    "follow the path",
+    "follow the road",
+    "enter",
+    "enters",
+    "leave",
+    "leaves",
+    "wait",
+    "waits",
+    "rest",
+    "rests",
+    "sit",
+    "sits",
+    "sit down",
+    "stand up",
+    "stands up",
+    "look",
+    "looks",
+    "look around",
+    "watch",
+    "watches",
+    "listen",
+    "listens",
+    "read",
+    "reads",
+    "check",
+    "checks",
+    # Not say, ask, tell, reply or answer: what is said can be a request,
+    # a bluff or a persuasion attempt, which the LLM rolls for
+    "talk",
+    "talks",
+    "greet",
+    "greets",
+    "thank",
+    "thanks",
+    "wave",
+    "waves",
+    "nod",
+    "nods",
+    "smile",
+    "smiles",
+    "call out",
+    "introduce",
+    "introduces",
+    "eat",
+    "eats",
+    "drink",
+    "drinks",
+    "sleep",
+    "sleeps",
+    "pick up",
+    "picks up",
+    "take out",
+    "takes out",
+    "put away",
+    "puts away",
+    "open my",
+    "opens my",
+    "open the door",
+    "opens the door",
+    "close",
+    "closes",
+)
+
+_RISK_WORDS = (
+    "attack",
+    "fight",
+    "punch",
+    "kick",
+    "stab",
+    "shoot",
+    "slash",
+    "strike",
+    "kill",
+    "hit",
+    "throw",
+    "cast",
+    "spell",
+    "climb",
+    "jump",
+    "leap",
+    "swim",
+    "run",
+    "flee",
+    "escape",
+    "dodge",
+    "hide",
+    "sneak",
+    "steal",
+    "pickpocket",
+    "lockpick",
+    "pick the lock",
+    "force",
+    "break",
+    "smash",
+    "persuade",
+    "convince",
+    "lie",
+    "lying",
+    "bribe",
+    "threaten",
+    "intimidate",
+    "seduce",
+    "deceive",
+    "bluff",
+    "trick",
+    "without being",
+    "look for",
+    "search",
+    "track",
+    "unnoticed",
+    "quickly",
+    "quietly",
+    "silently",
+    "carefully",
+    "past the",
+    "across",
+    "through the",
+    "locked",
+    "trap",
+    "poison",
+    "poisonous",
+    "disarm",
+    "defuse",
+    "hack",
+    "repair",
+    "heal",
+    "tame",
+)
+
+_DANGER_WORDS = (
+    "chasing",
+    "chases",
+    "chased",
+    "pursue",
+    "pursuing",
+    "attack",
+    "attacks",
+    "attacking",
+    "charges",
+    "lunges",
+    "growls",
+    "growling",
+    "snarls",
+    "snarling",
+    "hostile",
+    "hostiles",
+    "enemy",
+    "enemies",
+    "monster",
+    "guard",
+    "guards",
+    "locked",
+    "trapped",
+    "collapsing",
+    "falling",
+    "burning",
+    "flood",
+    "bleeding",
+    "gun",
+    "blade",
+    "sword",
+    "fight",
+    "combat",
+)
+
+
+def _alternation(words) -> str:
+    # Longest first so that "turn around" wins over "turn"
+    return "|".join(
+        re.escape(word).replace(r"\ ", r"\s+")
+        for word in sorted(words, key=len, reverse=True)
+    )
+
+
+def _inflected_alternation(words) -> str:
+    """Like _alternation, but also matches -s, -ed and -ing forms"""
+    forms = []
+    for word in sorted(words, key=len, reverse=True):
+        stem = re.escape(word).replace(r"\ ", r"\s+")
+        if word.endswith("e"):
+            forms.append(f"{stem[:-1]}(?:e|es|ed|ing)")
+        else:
+            forms.append(f"{stem}(?:s|es|ed|ing|{word[-1]}ing|{word[-1]}ed)?")
+    return "|".join(forms)
+
+
+_TRIVIAL_PATTERN = re.compile(
+    rf"^\s*{_LEADING_FILLER}(?:{_alternation(_TRIVIAL_VERBS)})\b",
+    re.IGNORECASE,
+)
+_RISK_PATTERN = re.compile(
+    rf"\b(?:{_inflected_alternation(_RISK_WORDS)})\b", re.IGNORECASE
+)
+_DANGER_PATTERN = re.compile(
+    rf"\b(?:{_alternation(_DANGER_WORDS)})\b", re.IGNORECASE
+)
+
+
+def classify_action(
+    story: str,
+    action: str,
+    max_words: int = None,
+    story_chars: int = None,
+) -> Optional[int]:
+    """
+    Returns TRIVIAL_THRESHOLD if the action clearly needs no roll, or None
+    if the LLM has to decide.
+    """
+    if max_words is None:
+        max_words = settings.DICE_TRIVIAL_MAX_WORDS
+    if story_chars is None:
+        story_chars = settings.DICE_CACHE_STORY_CHARS
+    if len(action.split()) > max_words:
+        return None
+    if not _TRIVIAL_PATTERN.match(action):
+        return None
+    if _RISK_PATTERN.search(action):
+        return None
+    if _DANGER_PATTERN.search(story[-story_chars:] if story_chars else story):
+        return None
+    return TRIVIAL_THRESHOLD
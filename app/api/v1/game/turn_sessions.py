@@ -0,0 +1,113 @@
+"""
+Server-side game sessions for /turn.
+
+/generate_new_scene needs the whole GameSession, every scene included, on
+every turn. /turn only needs the action: after each scene the session is
+kept here per user, with the new scene appended, and the next turn plays
+on from it. A client that sends its game_session to /turn replaces the
+kept one, which is how a game is started, loaded or resynced.
+
+Sessions expire after TURN_SESSION_TTL_SECONDS without a turn. At most
+TURN_SESSION_MAX_SIZE users and TURN_SESSION_MAX_BYTES of sessions (as
+JSON) are kept, least recently used first out. Sessions grow with every
+scene, so the byte cap is what bounds memory for long games.
+
+NOTE: Sessions are per worker. A /turn without game_session that lands on
+another worker is answered with 409, and the client sends its session.
+"""
+
+# External imports
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+import time
+
+# Internal imports
+from app.settings import settings
+from app.api.v1.validation.schemas import GameSession
+
+
+def next_session(
+    game_session: GameSession, scene: Dict[str, Any]
+) -> GameSession:
+    """game_session with scene appended as the scene to act on next"""
+    return game_session.model_copy(
+        update={
+            "scenes": [
+                *game_session.scenes,
+                {
+                    "story": scene["story"],
+                    "compressed_story": scene.get("compressed_story"),
+                },
+            ],
+            "current_story": scene["story"],
+        }
+    )
+
+
+def with_action(
+    game_session: GameSession, action: str, dice_success: bool
+) -> GameSession:
+    """game_session with action and its roll on the last scene"""
+    scenes = list(game_session.scenes)
+    scenes[-1] = dict(scenes[-1], action=action, dice_success=dice_success)
+    return game_session.model_copy(update={"scenes": scenes})
+
+
+class TurnSessionStore:
+    """Bounded LRU store of one game session per user, with a TTL"""
+
+    def __init__(
+        self, max_size: int = None, max_bytes: int = None, ttl: float = None
+    ):
+        self.max_size = max_size or settings.TURN_SESSION_MAX_SIZE
+        self.max_bytes = max_bytes or settings.TURN_SESSION_MAX_BYTES
+        self.ttl = (
+            ttl if ttl is not None else settings.TURN_SESSION_TTL_SECONDS
+        )
+        # user_id -> (game_session, expires_at, size in bytes)
+        self._entries: "OrderedDict[UUID, Tuple[GameSession, float, int]]" = (
+            OrderedDict()
+        )
+        self.total_bytes = 0
+
+    def get(self, user_id: UUID) -> Optional[GameSession]:
+        """Returns the user's session, or None if missing or expired"""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        game_session, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(user_id)
+            return None
+        self._entries.move_to_end(user_id)
+        return game_session
+
+    def set(self, user_id: UUID, game_session: GameSession):
+        if self.ttl <= 0:
+            return
+        self._remove(user_id)
+        size = len(game_session.model_dump_json())
+        self._entries[user_id] = (
+            game_session,
+            time.monotonic() + self.ttl,
+            size,
+        )
+        self.total_bytes += size
+        while self._entries and (
+            len(self._entries) > self.max_size
+            or self.total_bytes > self.max_bytes
+        ):
+            self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def _remove(self, user_id: UUID):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self.total_bytes -= entry[2]
+
+
+turn_sessions = TurnSessionStore()
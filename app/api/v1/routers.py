@@ -2,8 +2,13 @@
 from fastapi import APIRouter
 
 # Internal imports
-from app.api.v1.endpoints import game_endpoints, user_endpoints
+from app.api.v1.endpoints import (
+    game_endpoints,
+    user_endpoints,
+    image_endpoints,
+)
 
 router = APIRouter(prefix="/v1")
 router.include_router(game_endpoints.router)
 router.include_router(user_endpoints.router)
+router.include_router(image_endpoints.router)
@@ -0,0 +1,235 @@
+"""
+Content-addressed storage for images.
+
+Images are stored as raw bytes keyed by the SHA-256 of their content, so
+the same image is only stored once no matter how many rows reference it.
+Database rows only hold the key (image_id). Resized variants of an image
+are derived from its content, so they are stored next to it under
+"{image_id}.{variant}.{format}" keys and are just as immutable.
+
+- ImageStore: Interface that every backend implements. An object store
+  (S3 or similar) can be added by implementing it.
+
+- LocalImageStore: Keeps images on the local filesystem under
+  IMAGE_STORE_PATH, sharded by the first characters of the key.
+"""
+
+# External imports
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Iterator, Optional
+import asyncio
+import base64
+import hashlib
+import os
+import re
+import tempfile
+
+# Internal imports
+from app.settings import settings
+from app.api.logger.loggable import Loggable
+
+IMAGE_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+STORAGE_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}(\.[a-z0-9]+)*$")
+CHUNK_SIZE = 1024 * 1024
+
+
+def is_image_id(image_id: Optional[str]) -> bool:
+    """True if image_id looks like a key produced by the image store"""
+    return bool(image_id) and bool(IMAGE_ID_PATTERN.match(image_id))
+
+
+def variant_key(image_id: str, variant: str, image_format: str) -> str:
+    """Storage key of a variant of an image"""
+    return f"{image_id}.{variant}.{image_format}"
+
+
+class ImageStore(Loggable, ABC):
+    """
+    Interface for image storage backends. A backend that misses one of the
+    abstract methods fails when it is created.
+    """
+
+    @abstractmethod
+    def put(self, data: bytes) -> str:
+        """Stores data and returns its image_id"""
+
+    @abstractmethod
+    def put_stream(self, stream: BinaryIO) -> str:
+        """Stores the content of a binary stream and returns its image_id"""
+
+    @abstractmethod
+    def put_derived(self, key: str, data: bytes) -> str:
+        """Stores data derived from an image, such as a variant, under key"""
+
+    @abstractmethod
+    def exists(self, image_id: str) -> bool:
+        """True if image_id is stored"""
+
+    @abstractmethod
+    def get(self, image_id: str) -> bytes:
+        """Returns the stored bytes"""
+
+    @abstractmethod
+    def iter_chunks(self, image_id: str) -> Iterator[bytes]:
+        """Yields the stored bytes in chunks"""
+
+    def local_path(self, image_id: str) -> Optional[str]:
+        """Path on the local filesystem, or None for remote backends"""
+        return None
+
+    def media_type(self, image_id: str) -> str:
+        chunk = next(self.iter_chunks(image_id), b"")
+        return guess_media_type(chunk[:16])
+
+    def put_base64(self, b64_image: str) -> str:
+        """Decodes a base64 image (or data URL) and stores the raw bytes"""
+        if b64_image.startswith("data:"):
+            b64_image = b64_image.split(",", 1)[-1]
+        return self.put(base64.b64decode(b64_image, validate=True))
+
+    async def put_async(self, data: bytes) -> str:
+        return await asyncio.to_thread(self.put, data)
+
+    async def put_base64_async(self, b64_image: str) -> str:
+        return await asyncio.to_thread(self.put_base64, b64_image)
+
+    async def put_derived_async(self, key: str, data: bytes) -> str:
+        return await asyncio.to_thread(self.put_derived, key, data)
+
+    async def get_async(self, image_id: str) -> bytes:
+        return await asyncio.to_thread(self.get, image_id)
+
+
+class LocalImageStore(ImageStore):
+    """Stores images as files named after their SHA-256"""
+
+    def __init__(self, root: str = None) -> None:
+        super().__init__()
+        self.root = os.path.abspath(root or settings.IMAGE_STORE_PATH)
+        os.makedirs(self.root, exist_ok=True)
+        self.logger.info(f"Local image store at {self.root}")
+
+    def _path(self, key: str) -> str:
+        if not STORAGE_KEY_PATTERN.match(key):
+            raise ValueError(f"Invalid image key: {key[:16]}")
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def put(self, data: bytes) -> str:
+        image_id = hashlib.sha256(data).hexdigest()
+        path = self._path(image_id)
+        if os.path.exists(path):
+            self.logger.debug(f"Image {image_id[:10]}... already stored")
+            return image_id
+        self._write_atomic(path, [data])
+        self.logger.info(
+            f"Stored image {image_id[:10]}... ({len(data) / 1000} KB)"
+        )
+        return image_id
+
+    def put_derived(self, key: str, data: bytes) -> str:
+        path = self._path(key)
+        if not os.path.exists(path):
+            self._write_atomic(path, [data])
+        return key
+
+    def put_stream(self, stream: BinaryIO) -> str:
+        """
+        Copies a stream into the store chunk by chunk while hashing it, so
+        large files never have to be held in memory.
+        """
+        os.makedirs(os.path.join(self.root, "tmp"), exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.join(self.root, "tmp"))
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            image_id = digest.hexdigest()
+            path = self._path(image_id)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+                self.logger.info(f"Stored image {image_id[:10]}...")
+            return image_id
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _write_atomic(self, path: str, chunks):
+        """Writes to a temporary file first so readers never see half a file"""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                for chunk in chunks:
+                    tmp.write(chunk)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def exists(self, key: str) -> bool:
+        return bool(STORAGE_KEY_PATTERN.match(key)) and os.path.exists(
+            self._path(key)
+        )
+
+    def get(self, image_id: str) -> bytes:
+        with open(self._path(image_id), "rb") as f:
+            return f.read()
+
+    def iter_chunks(self, image_id: str) -> Iterator[bytes]:
+        with open(self._path(image_id), "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                yield chunk
+
+    def local_path(self, image_id: str) -> Optional[str]:
+        return self._path(image_id)
+
+    def media_type(self, image_id: str) -> str:
+        with open(self._path(image_id), "rb") as f:
+            return guess_media_type(f.read(16))
+
+
+_image_store: Optional[ImageStore] = None
+
+
+def get_image_store() -> ImageStore:
+    """Returns the store selected by IMAGE_STORE_BACKEND"""
+    global _image_store
+    if _image_store is None:
+        if settings.IMAGE_STORE_BACKEND != "local":
+            raise ValueError(
+                f"Unknown image store backend: {settings.IMAGE_STORE_BACKEND}"
+            )
+        _image_store = LocalImageStore()
+    return _image_store
+
+
+def guess_media_type(header: bytes) -> str:
+    """Media type of an image from its first bytes"""
+    if header.startswith(b"\x89PNG"):
+        return "image/png"
+    if header.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    if header[4:12] in (b"ftypavif", b"ftypavis"):
+        return "image/avif"
+    return "application/octet-stream"
+
+
+def image_url(
+    image_id: Optional[str], variant: Optional[str] = None
+) -> Optional[str]:
+    """The API path an image, or one of its variants, is served from"""
+    if not image_id:
+        return None
+    if variant:
+        return f"/v1/images/{image_id}?variant={variant}"
+    return f"/v1/images/{image_id}"
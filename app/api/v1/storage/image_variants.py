@@ -0,0 +1,205 @@
+"""
+Resized and transcoded variants of stored images.
+
+Stable Diffusion returns full-size PNGs, which are far larger than what a
+scene view or a save list needs. Every stored image can be served as:
+
+- "full": Bounded to IMAGE_FULL_MAX_SIDE pixels and IMAGE_FULL_MAX_BYTES.
+- "thumb": Bounded to IMAGE_THUMB_MAX_SIDE pixels and IMAGE_THUMB_MAX_BYTES.
+
+Each variant is encoded as AVIF or WebP depending on what the client
+accepts, with JPEG as a fallback for clients that accept neither. AVIF is
+only offered when the installed Pillow can write it.
+
+Encoding is CPU-bound, so it runs on a bounded thread pool (Pillow releases
+the GIL while it encodes). Variants are written to the image store the
+first time they are needed, or right after generation when
+IMAGE_EAGER_VARIANTS is set.
+"""
+
+# External imports
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Set
+import asyncio
+import io
+import os
+from PIL import Image, features
+
+# Internal imports
+from app.settings import settings
+from app.api.logger.logger import get_logger
+from app.api.v1.storage.image_store import get_image_store, variant_key
+
+logger = get_logger("app.api.storage.variants")
+
+
+class VariantSpec(NamedTuple):
+    max_side: int
+    max_bytes: int
+
+
+VARIANTS: Dict[str, VariantSpec] = {
+    "full": VariantSpec(
+        settings.IMAGE_FULL_MAX_SIDE, settings.IMAGE_FULL_MAX_BYTES
+    ),
+    "thumb": VariantSpec(
+        settings.IMAGE_THUMB_MAX_SIDE, settings.IMAGE_THUMB_MAX_BYTES
+    ),
+}
+
+
+def _can_write(image_format: str) -> bool:
+    """True if the installed Pillow was built with the format's plugin"""
+    try:
+        return bool(features.check_module(image_format))
+    except ValueError:
+        # Pillow versions without the plugin do not know the module name
+        return False
+
+
+# Formats in order of preference. JPEG is last since every client takes it.
+FORMATS: List[str] = [
+    image_format
+    for image_format in ("avif", "webp")
+    if _can_write(image_format)
+] + ["jpeg"]
+
+MEDIA_TYPES = {
+    "avif": "image/avif",
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+}
+
+QUALITY_STEP = 10
+
+_executor: Optional[ThreadPoolExecutor] = None
+_in_flight: Dict[str, asyncio.Future] = {}
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def get_image_executor() -> ThreadPoolExecutor:
+    """Returns the process-wide encoding pool, creating it on first use"""
+    global _executor
+    if _executor is None:
+        workers = settings.IMAGE_VARIANT_WORKERS or os.cpu_count() or 1
+        _executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="image"
+        )
+    return _executor
+
+
+def shutdown_image_executor():
+    """Stops the pool. Called when the application shuts down."""
+    global _executor
+    for task in _background_tasks:
+        task.cancel()
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """Picks the preferred format that the Accept header allows"""
+    accept = accept or ""
+    for image_format in FORMATS[:-1]:
+        if MEDIA_TYPES[image_format] in accept:
+            return image_format
+    return "jpeg"
+
+
+def encode_variant(data: bytes, spec: VariantSpec, image_format: str) -> bytes:
+    """
+    Resizes an image to fit spec and encodes it as image_format.
+    Quality is stepped down until the result fits spec.max_bytes. If even
+    IMAGE_VARIANT_MIN_QUALITY does not fit, that encoding is returned.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image.thumbnail(
+            (spec.max_side, spec.max_side), Image.Resampling.LANCZOS
+        )
+        if image_format == "jpeg":
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+
+        quality = settings.IMAGE_VARIANT_QUALITY
+        while True:
+            buffer = io.BytesIO()
+            image.save(buffer, format=image_format.upper(), quality=quality)
+            encoded = buffer.getvalue()
+            if (
+                len(encoded) <= spec.max_bytes
+                or quality <= settings.IMAGE_VARIANT_MIN_QUALITY
+            ):
+                return encoded
+            quality = max(
+                settings.IMAGE_VARIANT_MIN_QUALITY, quality - QUALITY_STEP
+            )
+
+
+def _build_variant_sync(image_id: str, variant: str, image_format: str) -> str:
+    store = get_image_store()
+    key = variant_key(image_id, variant, image_format)
+    if store.exists(key):
+        return key
+    encoded = encode_variant(
+        store.get(image_id), VARIANTS[variant], image_format
+    )
+    store.put_derived(key, encoded)
+    logger.info(
+        f"Stored {variant} {image_format} of {image_id[:10]}... "
+        f"({len(encoded) / 1000} KB)"
+    )
+    return key
+
+
+async def get_variant(image_id: str, variant: str, image_format: str) -> str:
+    """
+    Returns the storage key of a variant, encoding it first if needed.
+    Concurrent requests for the same missing variant share one encode.
+    """
+    key = variant_key(image_id, variant, image_format)
+    if get_image_store().exists(key):
+        return key
+    future = _in_flight.get(key)
+    if future is None:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            get_image_executor(),
+            _build_variant_sync,
+            image_id,
+            variant,
+            image_format,
+        )
+        _in_flight[key] = future
+        future.add_done_callback(lambda _: _in_flight.pop(key, None))
+    return await asyncio.shield(future)
+
+
+async def build_variants(image_id: str):
+    """
+    Encodes every variant of one image in the preferred format.
+    Other formats are only encoded when a client asks for them.
+    """
+    await asyncio.gather(
+        *(get_variant(image_id, variant, FORMATS[0]) for variant in VARIANTS)
+    )
+
+
+def schedule_variants(image_id: str):
+    """
+    Starts encoding the variants of a new image in the background, so they
+    are usually ready before the client asks for them.
+    """
+    if not settings.IMAGE_EAGER_VARIANTS:
+        return
+
+    async def build():
+        try:
+            await build_variants(image_id)
+        except Exception as e:
+            logger.error(f"Could not build variants of {image_id}: {str(e)}")
+
+    task = asyncio.create_task(build())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
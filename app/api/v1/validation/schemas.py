@@ -20,9 +20,24 @@ class GameSession(BaseModel):
     scenes: list
 
 
+class TurnRequest(BaseModel):
+    action: str
+    game_session: Optional[GameSession] = None
+
+
+class FusedScene(BaseModel):
+    """LLM output of a fused scene call. Missing fields are left as None."""
+
+    story: Optional[str] = None
+    compressed_story: Optional[str] = None
+    image_prompt: Optional[str] = None
+    mood: Optional[str] = None
+
+
 class SaveGame(BaseModel):
     game_session: GameSession
     image: Optional[str] = None
+    image_id: Optional[str] = None
 
 
 class UserCreate(BaseModel):
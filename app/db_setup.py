@@ -1,6 +1,12 @@
 # External imports
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
 # Internal imports
 from app.api.v1.database.models import Base
@@ -12,8 +18,39 @@ db_setup_logger = get_logger("app.database.setup")
 
 url = settings.DB_URL
 
+
+def get_async_url() -> str:
+    """DB_ASYNC_URL if set, otherwise DB_URL switched to the asyncpg driver"""
+    if settings.DB_ASYNC_URL:
+        return settings.DB_ASYNC_URL
+    return (
+        make_url(url)
+        .set(drivername="postgresql+asyncpg")
+        .render_as_string(hide_password=False)
+    )
+
+
 try:
-    engine = create_engine(f"{url}", echo=True)
+    # Synchronous engine for table creation and scripts (fill_db etc.)
+    engine = create_engine(f"{url}", echo=settings.DB_ECHO)
+    # Async engine used by the API. asyncpg caches prepared statements per
+    # connection and SQLAlchemy caches compiled statements per engine.
+    async_engine = create_async_engine(
+        get_async_url(),
+        echo=settings.DB_ECHO,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        query_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+        connect_args={
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE
+        },
+    )
+    async_session_factory = async_sessionmaker(
+        async_engine, expire_on_commit=False
+    )
     db_setup_logger.info("Database engine created successfully")
 except Exception as e:
     db_setup_logger.error(f"Error creating database engine: {str(e)}")
@@ -32,17 +69,39 @@ def init_db():
         db_setup_logger.error(f"Error creating database tables: {str(e)}")
 
 
-def get_db():
+async def close_db():
+    """Closes all pooled connections. Called when the application shuts down."""
+    await async_engine.dispose()
+
+
+def get_session() -> AsyncSession:
+    """
+    Returns a standalone session for work outside of a request,
+    such as background tasks. Use it as an async context manager.
     """
-    Returns a session to the database.
+    return async_session_factory()
+
+
+async def get_db():
+    """
+    Returns an async session to the database.
     Used when changes are made to the db during runtime.
     """
     db_setup_logger.debug("Creating new database session")
     try:
-        with Session(engine, expire_on_commit=False) as session:
+        async with async_session_factory() as session:
             db_setup_logger.debug("Database session created")
             yield session
             db_setup_logger.debug("Database session closed")
     except Exception as e:
         db_setup_logger.error(f"Error in database session: {str(e)}")
         raise
+
+
+def get_sync_db():
+    """
+    Returns a synchronous session to the database.
+    Used by scripts that run outside of the API, such as fill_db.
+    """
+    with Session(engine, expire_on_commit=False) as session:
+        yield session
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -17,5 +18,115 @@ class Settings(BaseSettings):
     START_LAMBDA_NAME: str
     REGION: str
 
+    # Database connection pool. DB_ASYNC_URL defaults to DB_URL with the
+    # asyncpg driver.
+    DB_ASYNC_URL: Optional[str] = None
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 500
+
+    # Content-addressed image storage
+    IMAGE_STORE_BACKEND: str = "local"
+    IMAGE_STORE_PATH: str = "image_store"
+
+    # Resized WebP/AVIF variants of stored images. Quality is lowered until
+    # a variant fits its byte budget. 0 workers means one per CPU core.
+    IMAGE_VARIANT_WORKERS: int = 0
+    IMAGE_VARIANT_QUALITY: int = 80
+    IMAGE_VARIANT_MIN_QUALITY: int = 40
+    IMAGE_FULL_MAX_SIDE: int = 1024
+    IMAGE_FULL_MAX_BYTES: int = 200_000
+    IMAGE_THUMB_MAX_SIDE: int = 256
+    IMAGE_THUMB_MAX_BYTES: int = 20_000
+    IMAGE_EAGER_VARIANTS: bool = True
+    # Include the full base64 PNG in scene responses. Clients that load
+    # image_url instead can turn this off to save bandwidth.
+    SCENE_INLINE_IMAGE: bool = True
+
+    # Text generation (OpenAI) model, also used to pick the tokenizer
+    OPENAI_TEXT_MODEL: str = "gpt-3.5-turbo"
+
+    # Text generation (OpenAI) client tuning
+    OPENAI_TIMEOUT_SECONDS: float = 60.0
+    OPENAI_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    OPENAI_MAX_CONNECTIONS: int = 64
+    OPENAI_MAX_CONCURRENCY: int = 48
+    OPENAI_MAX_RETRIES: int = 2
+
+    # Image generation (Stable Diffusion) client tuning
+    SD_TIMEOUT_SECONDS: float = 180.0
+    SD_CONNECT_TIMEOUT_SECONDS: float = 10.0
+    SD_MAX_CONNECTIONS: int = 8
+    SD_MAX_CONCURRENCY: int = 4
+
+    # Stable Diffusion EC2 warm-state tracking
+    EC2_WARM_TTL_SECONDS: float = 120.0
+    EC2_KEEP_WARM_INTERVAL_SECONDS: float = 60.0
+    EC2_KEEP_WARM_IDLE_SECONDS: float = 900.0
+
+    # Starting stories are cached per process. The seed version is checked
+    # at most every CHECK_SECONDS, and clients may reuse a story for MAX_AGE.
+    STARTING_STORY_CACHE_CHECK_SECONDS: float = 60.0
+    STARTING_STORY_MAX_AGE_SECONDS: int = 3600
+
+    # Worker threads for bcrypt. 0 means one per CPU core.
+    PASSWORD_HASH_WORKERS: int = 0
+
+    # Rate limiting. "memory" keeps counters in-process, "database" uses
+    # the rate_limits table on every request.
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    RATE_LIMIT_FLUSH_INTERVAL_SECONDS: float = 30.0
+
+    # Cache of dice thresholds by normalized story/action. 0 disables it.
+    DICE_CACHE_MAX_SIZE: int = 50_000
+    DICE_CACHE_STORY_CHARS: int = 300
+    # Answer obviously trivial actions (walking, talking...) without the LLM
+    DICE_TRIVIAL_FAST_PATH: bool = True
+    DICE_TRIVIAL_MAX_WORDS: int = 12
+
+    # Scene music mood. "local" uses the keyword classifier, "llm" always
+    # asks the LLM. With MOOD_LLM_FALLBACK the LLM is asked when the local
+    # classifier finds no clear mood, otherwise the default mood is used.
+    MOOD_CLASSIFIER: str = "local"
+    MOOD_LLM_FALLBACK: bool = False
+    MOOD_MIN_SCORE: float = 2.5
+
+    # compressed_story. "llm" asks the LLM for a summary, "local" picks
+    # sentences from the story itself without a remote call.
+    STORY_COMPRESSOR: str = "llm"
+    COMPRESSED_STORY_MAX_CHARS: int = 100
+
+    # Scene text generation. "separate" makes one LLM call per stage (story,
+    # compression, image prompt, mood), "fused" asks for all four as one
+    # JSON object and only falls back to separate calls for missing fields.
+    SCENE_GENERATION_MODE: str = "separate"
+
+    # Token budget of the story prompt, counted with tiktoken for
+    # OPENAI_TEXT_MODEL. Recent scenes are sent in full and older ones as
+    # their compressed_story until the budget is spent.
+    STORY_PROMPT_TOKEN_BUDGET: int = 2000
+
+    # Speculative scenes. Starts generating the next scene as soon as the
+    # dice are rolled, so /generate_new_scene finds it ready. Costs a scene
+    # for every roll that is not followed by /generate_new_scene.
+    SPECULATIVE_SCENES: bool = False
+    SPECULATIVE_TTL_SECONDS: float = 300.0
+    SPECULATIVE_MAX_SESSIONS: int = 1_000
+    SPECULATIVE_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # Game sessions kept per user for /turn, so a turn only sends the action
+    TURN_SESSION_TTL_SECONDS: float = 3600.0
+    TURN_SESSION_MAX_SIZE: int = 10_000
+    TURN_SESSION_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # Cache of validated bearer tokens (token -> user_id)
+    TOKEN_CACHE_TTL_SECONDS: float = 60.0
+    TOKEN_CACHE_MAX_SIZE: int = 10_000
+
 
 settings = Settings()
@@ -0,0 +1,71 @@
+"""
+Benchmark for password checking throughput.
+
+Simulates a burst of logins by running bcrypt.checkpw through the async
+password_hashing API with different pool sizes, and compares it with the
+old behaviour of checking on the event loop. Throughput should grow with
+the number of workers up to the number of cores.
+
+Run from the project root:
+    python -m benchmarks.login_throughput
+    python -m benchmarks.login_throughput --logins 64 --workers 1 2 4 8
+"""
+
+# External imports
+import argparse
+import asyncio
+import os
+import time
+
+# Internal imports
+from app.api.v1.database import password_hashing
+from app.settings import settings
+
+
+async def run_on_event_loop(hashed: str, logins: int) -> float:
+    """The old behaviour: every check blocks the loop"""
+    start = time.perf_counter()
+    for _ in range(logins):
+        password_hashing._check_password_sync("hunter2", hashed)
+    return logins / (time.perf_counter() - start)
+
+
+async def run_on_pool(hashed: str, logins: int, workers: int) -> float:
+    password_hashing.shutdown_executor()
+    settings.PASSWORD_HASH_WORKERS = workers
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            password_hashing.check_password("hunter2", hashed)
+            for _ in range(logins)
+        )
+    )
+    elapsed = time.perf_counter() - start
+    password_hashing.shutdown_executor()
+    return logins / elapsed
+
+
+async def main(logins: int, workers: list[int]):
+    hashed = await password_hashing.hash_password("hunter2")
+    print(f"CPU cores: {os.cpu_count()}, logins per run: {logins}")
+    baseline = await run_on_event_loop(hashed, logins)
+    print(f"{'event loop':>12}: {baseline:8.1f} logins/s")
+    for count in workers:
+        throughput = await run_on_pool(hashed, logins, count)
+        print(
+            f"{f'{count} worker(s)':>12}: {throughput:8.1f} logins/s "
+            f"({throughput / baseline:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, 2, 4, os.cpu_count() or 1}),
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.workers))
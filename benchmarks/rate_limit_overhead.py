@@ -0,0 +1,90 @@
+"""
+Micro-benchmark for the per-request overhead of the rate limiting layer.
+
+Calls a no-op endpoint directly, through the @rate_limit decorator (policy
+compiled once at decoration time), and through a policy rebuilt for every
+request like the decorators used to do. The in-memory backend is used so no
+database is needed.
+
+Run from the project root:
+    python -m benchmarks.rate_limit_overhead
+    python -m benchmarks.rate_limit_overhead --requests 200000
+"""
+
+# External imports
+import argparse
+import asyncio
+import time
+from starlette.requests import Request
+
+# Internal imports
+from app.settings import settings
+
+settings.RATE_LIMIT_BACKEND = "memory"
+
+from app.api.v1.endpoints.rate_limiting import (  # noqa: E402
+    RateLimitPolicy,
+    rate_limit,
+)
+
+LIMIT = 10**9
+
+
+def make_request() -> Request:
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/v1/benchmark",
+        "headers": [],
+        "query_string": b"",
+        "client": ("127.0.0.1", 12345),
+        "server": ("testserver", 80),
+        "scheme": "http",
+    }
+    return Request(scope)
+
+
+async def endpoint(request: Request, db=None):
+    return {"message": "Hello, world!"}
+
+
+@rate_limit(authenticated_limit=LIMIT, unauthenticated_limit=LIMIT)
+async def limited_endpoint(request: Request, db=None):
+    return {"message": "Hello, world!"}
+
+
+async def rebuilt_policy_endpoint(request: Request, db=None):
+    policy = RateLimitPolicy(LIMIT, LIMIT, 60)
+    await policy.enforce(request, db)
+    return await endpoint(request, db=db)
+
+
+async def measure(func, requests: int) -> float:
+    """Returns microseconds per call"""
+    start = time.perf_counter()
+    for _ in range(requests):
+        await func(make_request(), db=None)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def main(requests: int):
+    baseline = await measure(endpoint, requests)
+    compiled = await measure(limited_endpoint, requests)
+    rebuilt = await measure(rebuilt_policy_endpoint, requests)
+    print(f"Requests per run: {requests}")
+    print(f"{'no rate limit':>22}: {baseline:7.2f} us/request")
+    print(
+        f"{'compiled policy':>22}: {compiled:7.2f} us/request "
+        f"(+{compiled - baseline:.2f} us)"
+    )
+    print(
+        f"{'policy per request':>22}: {rebuilt:7.2f} us/request "
+        f"(+{rebuilt - baseline:.2f} us)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
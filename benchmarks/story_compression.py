@@ -0,0 +1,104 @@
+"""
+Latency and output length of the local story compressor against the LLM.
+
+Compresses every story in benchmarks/data/stories.jsonl with the local
+extractive compressor and reports time per story, output lengths and how
+many outputs fit the character budget. With --llm the same stories are
+also sent through the LLM path (GameContextManager with
+STORY_COMPRESSOR=llm), which needs the usual settings and OPENAI_API_KEY.
+
+Run from the project root:
+    python -m benchmarks.story_compression
+    python -m benchmarks.story_compression --show
+    python -m benchmarks.story_compression --llm
+"""
+
+# External imports
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+# Internal imports
+from app.settings import settings
+from app.api.v1.game.story_compressor import compress_story
+
+DATASET = os.path.join(os.path.dirname(__file__), "data", "stories.jsonl")
+
+
+def load(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["story"] for line in f if line.strip()]
+
+
+def report(name: str, outputs, seconds, max_chars: int):
+    lengths = [len(output) for output in outputs]
+    fits = sum(length <= max_chars for length in lengths)
+    print(
+        f"{name:>6}: {statistics.mean(seconds) * 1000:9.3f} ms/story "
+        f"(max {max(seconds) * 1000:.3f} ms), "
+        f"length mean {statistics.mean(lengths):.0f} / max {max(lengths)}, "
+        f"{fits}/{len(outputs)} within {max_chars} chars"
+    )
+
+
+def run_local(stories, max_chars: int, repeat: int):
+    outputs, seconds = [], []
+    for story in stories:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            output = compress_story(story, max_chars)
+        seconds.append((time.perf_counter() - start) / repeat)
+        outputs.append(output)
+    return outputs, seconds
+
+
+async def run_llm(stories):
+    from app.api.v1.game.context_manager import GameContextManager
+
+    settings.STORY_COMPRESSOR = "llm"
+    manager = GameContextManager()
+    outputs, seconds = [], []
+    for story in stories:
+        start = time.perf_counter()
+        outputs.append(await manager.compress(story))
+        seconds.append(time.perf_counter() - start)
+    return outputs, seconds
+
+
+def main(path: str, max_chars: int, repeat: int, llm: bool, show: bool):
+    stories = load(path)
+    print(
+        f"Stories: {len(stories)}, mean length "
+        f"{statistics.mean(len(story) for story in stories):.0f} chars"
+    )
+    local_outputs, local_seconds = run_local(stories, max_chars, repeat)
+    report("local", local_outputs, local_seconds, max_chars)
+    llm_outputs = None
+    if llm:
+        llm_outputs, llm_seconds = asyncio.run(run_llm(stories))
+        report("llm", llm_outputs, llm_seconds, max_chars)
+    if show:
+        for index, output in enumerate(local_outputs):
+            print(f"\nlocal: {output}")
+            if llm_outputs:
+                print(f"  llm: {llm_outputs[index]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dataset", default=DATASET)
+    parser.add_argument(
+        "--max-chars", type=int, default=settings.COMPRESSED_STORY_MAX_CHARS
+    )
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument(
+        "--llm", action="store_true", help="Also run the LLM path"
+    )
+    parser.add_argument(
+        "--show", action="store_true", help="Print every compressed story"
+    )
+    args = parser.parse_args()
+    main(args.dataset, args.max_chars, args.repeat, args.llm, args.show)
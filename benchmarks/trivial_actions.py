@@ -0,0 +1,137 @@
+"""
+Offline coverage and latency benchmark for the trivial action fast path.
+
+Runs classify_action over a set of story/action pairs and reports how many
+dice LLM calls it would skip (coverage) and the time per classification.
+
+The thresholds in benchmarks/data/dice_actions_hand_labeled.jsonl, one
+{"story", "action", "threshold"} object per line, were written by hand by
+the author of the lexicon, not answered by the LLM. The reported agreement
+is therefore only a consistency check between the lexicon and its
+author's own judgement, not a measure of how often the LLM would agree.
+Every skip the labels disagree with is listed.
+
+--label-with-llm asks the configured LLM for a threshold for every pair
+(needs the usual settings and OPENAI_API_KEY) and writes the result to
+--output, so the benchmark can be run against LLM labels instead:
+    python -m benchmarks.trivial_actions --label-with-llm \
+        --output benchmarks/data/dice_actions_llm.jsonl
+    python -m benchmarks.trivial_actions \
+        --dataset benchmarks/data/dice_actions_llm.jsonl
+
+Run from the project root:
+    python -m benchmarks.trivial_actions
+    python -m benchmarks.trivial_actions --trivial-max 2
+"""
+
+# External imports
+import argparse
+import asyncio
+import json
+import os
+import time
+
+# Internal imports
+from app.api.v1.game.trivial_actions import classify_action
+
+DATASET = os.path.join(
+    os.path.dirname(__file__), "data", "dice_actions_hand_labeled.jsonl"
+)
+
+
+def load(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def label_with_llm(rows):
+    """Replaces every threshold with the LLM's answer"""
+    from app.api.v1.game.context_manager import GameContextManager
+    from app.api.v1.validation.schemas import StoryActionSegment
+
+    manager = GameContextManager()
+    for row in rows:
+        segment = StoryActionSegment(story=row["story"], action=row["action"])
+        prompt = await manager.prompt.get_dice_prompt(segment)
+        output = await manager.text.api_call(prompt)
+        row["threshold"] = await manager._convert_dice_threshold_to_int(output)
+        print(f"{row['threshold']:>3} {row['action']}")
+
+
+def save(path: str, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def measure_latency(rows, repeat: int) -> float:
+    """Returns microseconds per classification"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for row in rows:
+            classify_action(row["story"], row["action"])
+    return (time.perf_counter() - start) / (repeat * len(rows)) * 1e6
+
+
+def main(path: str, trivial_max: int, repeat: int):
+    rows = load(path)
+    skipped = [
+        row
+        for row in rows
+        if classify_action(row["story"], row["action"]) is not None
+    ]
+    trivial = [row for row in rows if row["threshold"] <= trivial_max]
+    correct = [row for row in skipped if row["threshold"] <= trivial_max]
+    disagreements = [row for row in skipped if row["threshold"] > trivial_max]
+
+    print(f"Labeled actions: {len(rows)} ({len(trivial)} trivial)")
+    print(
+        f"{'coverage':>12}: {len(skipped) / len(rows):6.1%} "
+        f"of LLM calls skipped"
+    )
+    if skipped:
+        print(
+            f"{'agreement':>12}: {len(correct) / len(skipped):6.1%} "
+            "of skips labeled trivial"
+        )
+    if trivial:
+        print(
+            f"{'recall':>12}: {len(correct) / len(trivial):6.1%} "
+            "of actions labeled trivial caught"
+        )
+    print(f"{'latency':>12}: {measure_latency(rows, repeat):6.2f} us/action")
+    for row in disagreements:
+        print(
+            f"Skip labeled {row['threshold']}: "
+            f"{row['action']!r} after {row['story'][-60:]!r}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dataset", default=DATASET)
+    parser.add_argument(
+        "--trivial-max",
+        type=int,
+        default=2,
+        help="Highest labeled threshold that still counts as trivial",
+    )
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument(
+        "--label-with-llm",
+        action="store_true",
+        help="Label every action with the LLM and write it to --output",
+    )
+    parser.add_argument(
+        "--output", help="Where --label-with-llm writes the LLM labels"
+    )
+    args = parser.parse_args()
+    dataset = args.dataset
+    if args.label_with_llm:
+        if not args.output:
+            parser.error("--label-with-llm needs --output")
+        rows = load(args.dataset)
+        asyncio.run(label_with_llm(rows))
+        save(args.output, rows)
+        dataset = args.output
+    main(dataset, args.trivial_max, args.repeat)
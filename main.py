@@ -1,12 +1,21 @@
 # External imports
 import uvicorn
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 # Internal imports
 from app.api.v1.routers import router as game_router
-from app.db_setup import init_db
+from app.db_setup import init_db, close_db
+from app.api.v1.game.generative_apis import close_http_clients
+from app.api.v1.game.ec2_warm_state import ec2_warm_state
+from app.api.v1.database.password_hashing import shutdown_executor
+from app.api.v1.storage.image_variants import shutdown_image_executor
+from app.api.v1.endpoints.rate_limit_backends import get_rate_limit_backend
+from app.api.v1.database.starting_story_cache import starting_story_cache
+from app.api.v1.game.speculative_scenes import speculative_scenes
+from app.api.v1.game.token_counter import get_encoder
 from app.api.logger.logger import get_logger
 
 # Create main application logger
@@ -18,8 +27,19 @@ async def lifespan(app: FastAPI):
     app_logger.info("Application starting up - initializing database")
     init_db()
     app_logger.info("Database initialized successfully")
+    ec2_warm_state.start_keep_warm()
+    await get_rate_limit_backend().start()
+    await starting_story_cache.start()
+    await asyncio.to_thread(get_encoder)
     yield
     app_logger.info("Application shutting down")
+    await ec2_warm_state.stop_keep_warm()
+    speculative_scenes.clear()
+    await get_rate_limit_backend().stop()
+    await close_db()
+    shutdown_executor()
+    shutdown_image_executor()
+    await close_http_clients()
 
 
 # Create the FastAPI app with lifespan